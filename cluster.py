@@ -0,0 +1,116 @@
+# cluster.py — lance N workers main.py, chacun avec sa plage de shards
+import os
+import sys
+import time
+import signal
+import asyncio
+import logging
+import aiohttp
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+)
+log = logging.getLogger("cluster")
+
+TOKEN = os.getenv("DISCORD_TOKEN")
+CLUSTER_WORKERS = int(os.getenv("CLUSTER_WORKERS", str(os.cpu_count() or 1)))
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "0"))  # 0 = nombre recommandé par Discord
+GATEWAY_URL = "https://discord.com/api/v10/gateway/bot"
+IDENTIFY_INTERVAL = 5  # Discord : 1 IDENTIFY / 5 s par bucket de max_concurrency
+RESTART_MAX_BACKOFF = 60
+# Un worker resté en vie plus longtemps est considéré sain : son backoff repart de 1 s
+HEALTHY_UPTIME = 300
+
+
+async def fetch_gateway() -> tuple[int, int]:
+    """(shards recommandés, max_concurrency) depuis /gateway/bot."""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(GATEWAY_URL, headers={"Authorization": f"Bot {TOKEN}"}) as resp:
+            resp.raise_for_status()
+            data = await resp.json()
+    return data["shards"], data["session_start_limit"]["max_concurrency"]
+
+
+def split_shards(shard_count: int, workers: int) -> list[list[int]]:
+    """Plages contiguës de shards, une par worker (les workers sans shard sont omis)."""
+    workers = min(workers, shard_count)
+    base, extra = divmod(shard_count, workers)
+    ranges, start = [], 0
+    for i in range(workers):
+        size = base + (1 if i < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return ranges
+
+
+class Worker:
+    def __init__(self, cluster_id: int, shard_ids: list[int], shard_count: int, start_delay: float):
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.start_delay = start_delay
+        self.process: asyncio.subprocess.Process | None = None
+        self.stopping = False
+
+    def env(self) -> dict:
+        env = dict(os.environ)
+        env.update(
+            SHARDED="1",
+            SHARD_COUNT=str(self.shard_count),
+            SHARD_IDS=",".join(map(str, self.shard_ids)),
+            CLUSTER_ID=str(self.cluster_id),
+        )
+        return env
+
+    async def run(self):
+        """Lance le worker et le relance (backoff exponentiel) s'il meurt."""
+        await asyncio.sleep(self.start_delay)
+        backoff = 1
+        while not self.stopping:
+            self.process = await asyncio.create_subprocess_exec(sys.executable, "main.py", env=self.env())
+            started = time.monotonic()
+            log.info("🚀 Worker %s started (pid %s, shards %s)", self.cluster_id, self.process.pid, self.shard_ids)
+            code = await self.process.wait()
+            if self.stopping:
+                break
+            if time.monotonic() - started >= HEALTHY_UPTIME:
+                backoff = 1
+            log.error("💥 Worker %s exited with code %s, restarting in %ss", self.cluster_id, code, backoff)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, RESTART_MAX_BACKOFF)
+
+    def terminate(self):
+        self.stopping = True
+        if self.process and self.process.returncode is None:
+            self.process.terminate()  # SIGTERM => arrêt propre côté main.py (flush des tampons)
+
+
+async def main():
+    shard_count, max_concurrency = await fetch_gateway()
+    shard_count = SHARD_COUNT or shard_count
+    ranges = split_shards(shard_count, CLUSTER_WORKERS)
+    log.info("🧩 %s shards across %s workers", shard_count, len(ranges))
+
+    # Démarrages échelonnés : chaque worker identifie ses shards avant que le suivant commence
+    workers, delay = [], 0.0
+    for cluster_id, shard_ids in enumerate(ranges):
+        workers.append(Worker(cluster_id, shard_ids, shard_count, delay))
+        delay += IDENTIFY_INTERVAL * len(shard_ids) / max_concurrency
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, lambda: [worker.terminate() for worker in workers])
+        except NotImplementedError:
+            pass
+
+    await asyncio.gather(*(worker.run() for worker in workers))
+    log.info("👋 All workers stopped")
+
+
+if __name__ == "__main__":
+    if not TOKEN:
+        log.error("❌ DISCORD_TOKEN manquant dans les variables d'environnement")
+    else:
+        asyncio.run(main())
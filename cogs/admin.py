@@ -1,10 +1,14 @@
+import os
 import logging
 import discord
 from discord import app_commands
 from discord.ext import commands
+from core.commandsync import record_sync
 
 log = logging.getLogger("cog-admin")
 
+REMINDER_CMD_COOLDOWN_SECONDS = int(os.getenv("REMINDER_CMD_COOLDOWN_SECONDS", "5"))
+
 
 class Admin(commands.Cog):
     def __init__(self, bot: commands.Bot):
@@ -26,6 +30,7 @@ class Admin(commands.Cog):
             if scope is None:
                 synced_guild = await self.bot.tree.sync(guild=interaction.guild)
                 synced_global = await self.bot.tree.sync()
+                await record_sync(self.bot)
                 await interaction.followup.send(
                     f"✅ {len(synced_guild)} commandes resynchronisées sur **{interaction.guild.name}**\n"
                     f"🌍 {len(synced_global)} commandes globales resynchronisées.",
@@ -39,6 +44,7 @@ class Admin(commands.Cog):
                 )
             elif scope.value == "global":
                 synced = await self.bot.tree.sync()
+                await record_sync(self.bot)
                 await interaction.followup.send(
                     f"🌍 {len(synced)} commandes globales resynchronisées.",
                     ephemeral=True
@@ -56,6 +62,7 @@ class Admin(commands.Cog):
             await self.bot.tree.sync(guild=None)
 
             synced = await self.bot.tree.sync()
+            await record_sync(self.bot)
             await interaction.followup.send(
                 f"🧹 Purge terminée. 🌍 {len(synced)} commandes globales republisées depuis ton code.",
                 ephemeral=True
@@ -82,12 +89,21 @@ class Admin(commands.Cog):
             )
             return
 
-        key = f"reminder:settings:{interaction.guild.id}:{interaction.user.id}:summon"
-        if state.value == "on":
-            await self.bot.redis.set(key, "1")
+        remaining = await self.bot.ratelimits.cooldown(
+            f"cooldown:reminder:{interaction.user.id}", REMINDER_CMD_COOLDOWN_SECONDS
+        )
+        if remaining > 0:
+            await interaction.response.send_message(
+                f"⏳ You must wait {remaining}s before using this command again.",
+                ephemeral=True
+            )
+            return
+
+        enabled = state.value == "on"
+        await self.bot.reminder_optouts.set_enabled(interaction.guild.id, interaction.user.id, enabled)
+        if enabled:
             await interaction.response.send_message("✅ Summon reminders activés.", ephemeral=True)
         else:
-            await self.bot.redis.set(key, "0")
             await interaction.response.send_message("⏸️ Summon reminders désactivés.", ephemeral=True)
 
 
@@ -0,0 +1,89 @@
+import os
+import logging
+import discord
+from discord.ext import commands
+from core.embeds import classify_embed
+from core.metrics import HANDLER_LATENCY
+
+log = logging.getLogger("cog-embed-events")
+
+# ID du bot de jeu dont on analyse les embeds (0 = tous les bots)
+GAME_BOT_ID = int(os.getenv("GAME_BOT_ID", "0"))
+# Mode raw : on lit le payload MESSAGE_UPDATE brut, sans cache de messages
+RAW_GATEWAY_EDITS = os.getenv("RAW_GATEWAY_EDITS", "0") == "1"
+
+
+class EmbedEvents(commands.Cog):
+    """Point d'entrée unique des MESSAGE_UPDATE : filtre l'auteur, classe l'embed
+    une fois puis redispatche un event typé (`on_summon_claimed`, `on_auto_summon`)."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @commands.Cog.listener()
+    async def on_message_edit(self, before: discord.Message, after: discord.Message):
+        if RAW_GATEWAY_EDITS:
+            return
+        if GAME_BOT_ID:
+            if after.author.id != GAME_BOT_ID:
+                return
+        elif not after.author.bot:
+            return
+        if not after.guild or not after.embeds:
+            return
+
+        embed = after.embeds[0]
+        with HANDLER_LATENCY.time(cog="EmbedEvents", event="message_edit"):
+            result = classify_embed(
+                after.guild,
+                after.channel,
+                after.id,
+                embed.title or "",
+                embed.description or "",
+                embed.footer.text if embed.footer and embed.footer.text else "",
+            )
+        if result:
+            event_name, event = result
+            self.bot.dispatch(event_name, event)
+
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        if not RAW_GATEWAY_EDITS:
+            return
+        data = payload.data
+        author = data.get("author")
+        if not author:
+            return
+        if GAME_BOT_ID:
+            if int(author["id"]) != GAME_BOT_ID:
+                return
+        elif not author.get("bot"):
+            return
+        embeds = data.get("embeds")
+        if not payload.guild_id or not embeds:
+            return
+        guild = self.bot.get_guild(payload.guild_id)
+        if not guild:
+            return
+
+        embed = embeds[0]
+        footer = embed.get("footer") or {}
+        with HANDLER_LATENCY.time(cog="EmbedEvents", event="raw_message_edit"):
+            result = classify_embed(
+                guild,
+                self.bot.get_partial_messageable(payload.channel_id, guild_id=payload.guild_id),
+                payload.message_id,
+                embed.get("title") or "",
+                embed.get("description") or "",
+                footer.get("text") or "",
+            )
+        if result:
+            event_name, event = result
+            self.bot.dispatch(event_name, event)
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(EmbedEvents(bot))
+    if not GAME_BOT_ID:
+        log.warning("⚠️ GAME_BOT_ID not set, embeds from every bot will be classified")
+    log.info("⚙️ EmbedEvents cog loaded (game bot=%s, raw=%s)", GAME_BOT_ID or "any", RAW_GATEWAY_EDITS)
@@ -1,57 +1,146 @@
-import asyncpg
+import asyncio
+import logging
 import discord
 from discord import app_commands
 from discord.ext import commands
 import os
+from core.cache import TTLCache, MISSING
+from core.rarity import RarityRule, parse_rules, dump_rules
+
+log = logging.getLogger("cog-guild-config")
+
+GUILD_CONFIG_CACHE_TTL = int(os.getenv("GUILD_CONFIG_CACHE_TTL", "600"))  # 10 min
+GUILD_CONFIG_CACHE_SIZE = int(os.getenv("GUILD_CONFIG_CACHE_SIZE", "10000"))
+INVALIDATE_CHANNEL = "guild_config_invalidate"
 
 class GuildConfig(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.cache = TTLCache(GUILD_CONFIG_CACHE_SIZE, GUILD_CONFIG_CACHE_TTL)
+        self._listener_task: asyncio.Task | None = None
+
+    async def cog_load(self):
+        self._listener_task = asyncio.create_task(self.listen_invalidations())
 
-    async def get_pool(self):
-        if not hasattr(self.bot, "db_pool"):
-            self.bot.db_pool = await asyncpg.create_pool(dsn=os.getenv("DATABASE_URL"))
-        return self.bot.db_pool
+    def cog_unload(self):
+        if self._listener_task:
+            self._listener_task.cancel()
 
-    # 🔧 Méthode manquante : retourne la config du serveur
+    # 🔧 Méthode manquante : retourne la config du serveur (cache TTL + LRU)
     async def get_config(self, guild_id: int):
-        pool = await self.get_pool()
-        async with pool.acquire() as conn:
-            row = await conn.fetchrow(
-                "SELECT guild_id, high_tier_role_id, required_role_id FROM guild_config WHERE guild_id = $1",
-                guild_id
-            )
-            return dict(row) if row else {}
+        config = self.cache.get(guild_id)
+        if config is not MISSING:
+            return config
+
+        config = await self.bot.db.get_guild_config(guild_id)
+        self.cache.set(guild_id, config)
+        return config
+
+    async def invalidate(self, guild_id: int):
+        """Vide l'entrée locale et prévient les autres process via Redis pub/sub."""
+        self.cache.pop(guild_id)
+        if getattr(self.bot, "redis", None):
+            try:
+                await self.bot.redis.publish(INVALIDATE_CHANNEL, str(guild_id))
+            except Exception as e:
+                log.error("❌ Impossible de publier l'invalidation Redis: %s", e)
+
+    async def listen_invalidations(self):
+        while True:
+            # Redis absent au démarrage : on attend que le reconnector installe un client
+            if not getattr(self.bot, "redis", None):
+                await asyncio.sleep(5)
+                continue
+            pubsub = self.bot.redis.pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATE_CHANNEL)
+                log.info("📡 Listening for guild config invalidations on %s", INVALIDATE_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    try:
+                        self.cache.pop(int(message["data"]))
+                    except ValueError:
+                        log.warning("⚠️ Invalid guild config invalidation: %r", message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Connexion perdue : on repart d'un cache vide pour ne rien rater
+                log.error("❌ Guild config invalidation listener failed: %s", e)
+                self.cache.clear()
+                await asyncio.sleep(5)
+            finally:
+                await pubsub.reset()
 
     @app_commands.command(name="set-high-tier-role", description="Configure le rôle High Tier pour ce serveur")
     @app_commands.checks.has_permissions(administrator=True)
     async def set_high_tier_role(self, interaction: discord.Interaction, role: discord.Role):
-        pool = await self.get_pool()
-        async with pool.acquire() as conn:
-            await conn.execute("""
-                INSERT INTO guild_config (guild_id, high_tier_role_id)
-                VALUES ($1, $2)
-                ON CONFLICT (guild_id) DO UPDATE
-                SET high_tier_role_id = EXCLUDED.high_tier_role_id,
-                    updated_at = CURRENT_TIMESTAMP
-            """, interaction.guild.id, role.id)
+        await self.bot.db.set_high_tier_role(interaction.guild.id, role.id)
+        await self.invalidate(interaction.guild.id)
 
         await interaction.response.send_message(f"✅ Rôle High Tier configuré : {role.mention}", ephemeral=True)
 
     @app_commands.command(name="set-required-role", description="Configure le rôle requis pour utiliser /high-tier")
     @app_commands.checks.has_permissions(administrator=True)
     async def set_required_role(self, interaction: discord.Interaction, role: discord.Role):
-        pool = await self.get_pool()
-        async with pool.acquire() as conn:
-            await conn.execute("""
-                INSERT INTO guild_config (guild_id, required_role_id)
-                VALUES ($1, $2)
-                ON CONFLICT (guild_id) DO UPDATE
-                SET required_role_id = EXCLUDED.required_role_id,
-                    updated_at = CURRENT_TIMESTAMP
-            """, interaction.guild.id, role.id)
+        await self.bot.db.set_required_role(interaction.guild.id, role.id)
+        await self.invalidate(interaction.guild.id)
 
         await interaction.response.send_message(f"✅ Rôle requis configuré : {role.mention}", ephemeral=True)
 
+    # --- Règles de rareté (High Tier) ---
+    @app_commands.command(name="set-rarity-rule", description="Ajoute ou remplace une règle de rareté High Tier")
+    @app_commands.describe(
+        rarity="Nom du palier (ex: SSR)",
+        emoji_ids="IDs d'émojis détectés dans l'embed, séparés par des virgules",
+        priority="Priorité (la plus haute l'emporte si plusieurs paliers sont détectés)",
+        message="Message du ping ({emoji} = émoji affiché)",
+        emoji="Émoji affiché dans le ping",
+        role="Rôle à ping pour ce palier (défaut : rôle High Tier)"
+    )
+    @app_commands.checks.has_permissions(administrator=True)
+    async def set_rarity_rule(self, interaction: discord.Interaction, rarity: str, emoji_ids: str, priority: int,
+                              message: str = None, emoji: str = None, role: discord.Role = None):
+        ids = tuple(i.strip() for i in emoji_ids.split(",") if i.strip())
+        if not ids:
+            await interaction.response.send_message("❌ Au moins un ID d'émoji est requis.", ephemeral=True)
+            return
+
+        config = await self.get_config(interaction.guild.id)
+        rules = [r for r in parse_rules(config.get("rarity_rules")) if r.rarity != rarity]
+        rules.append(RarityRule.from_dict({
+            "rarity": rarity, "emoji_ids": ids, "priority": priority,
+            "message": message, "emoji": emoji, "role_id": role.id if role else None
+        }))
+        await self.bot.db.set_rarity_rules(interaction.guild.id, dump_rules(rules))
+        await self.invalidate(interaction.guild.id)
+
+        await interaction.response.send_message(
+            f"✅ Règle **{rarity}** enregistrée ({len(rules)} palier(s) configuré(s)).", ephemeral=True
+        )
+
+    @app_commands.command(name="remove-rarity-rule", description="Supprime une règle de rareté High Tier")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def remove_rarity_rule(self, interaction: discord.Interaction, rarity: str):
+        config = await self.get_config(interaction.guild.id)
+        rules = parse_rules(config.get("rarity_rules"))
+        kept = [r for r in rules if r.rarity != rarity]
+        if len(kept) == len(rules):
+            await interaction.response.send_message(f"ℹ️ Aucune règle **{rarity}**.", ephemeral=True)
+            return
+
+        await self.bot.db.set_rarity_rules(interaction.guild.id, dump_rules(kept))
+        await self.invalidate(interaction.guild.id)
+
+        await interaction.response.send_message(f"🗑️ Règle **{rarity}** supprimée.", ephemeral=True)
+
+    @app_commands.command(name="reset-rarity-rules", description="Revient aux règles de rareté par défaut")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def reset_rarity_rules(self, interaction: discord.Interaction):
+        await self.bot.db.set_rarity_rules(interaction.guild.id, None)
+        await self.invalidate(interaction.guild.id)
+
+        await interaction.response.send_message("✅ Règles de rareté par défaut rétablies.", ephemeral=True)
+
 async def setup(bot: commands.Bot):
     await bot.add_cog(GuildConfig(bot))
@@ -1,44 +1,26 @@
-import time
+import os
 import logging
 import discord
 from discord import app_commands
-from discord.ext import commands, tasks
+from discord.ext import commands
+from core.cache import SeenSet
+from core.embeds import AutoSummon
+from core.outbound import PRIORITY_HIGH_TIER
+from core.metrics import HANDLER_LATENCY
+from core.rarity import matcher_for
 
 log = logging.getLogger("cog-high-tier")
 
-# IDs détectés dans les embeds de Mudae
-RARITY_EMOJIS = {
-    "1342202597389373530": "SR",
-    "1342202212948115510": "SSR",
-    "1342202203515125801": "UR",
-}
-
-# Émojis animés custom pour l’affichage
-RARITY_CUSTOM_EMOJIS = {
-    "SR": "<a:SRsun:1437411200450302022>",
-    "SSR": "<a:SSRsun:1437411914316779591>",
-    "UR": "<a:URsun:1437412024702341130>",
-}
-
-# Messages de rareté
-RARITY_MESSAGES = {
-    "SR":  "{emoji} has summoned, claim it!",
-    "SSR": "{emoji} has summoned, claim it!",
-    "UR":  "{emoji} has summoned, claim it!!",
-}
-
-# Priorité des raretés
-RARITY_PRIORITY = {"SR": 1, "SSR": 2, "UR": 3}
+# Dédoublonnage des pings : mémoire bornée + SET NX EX Redis entre réplicas
+ANNOUNCE_TTL_SECONDS = int(os.getenv("HIGH_TIER_DEDUPE_TTL", str(6 * 3600)))
+ANNOUNCE_MAX_TRACKED = int(os.getenv("HIGH_TIER_DEDUPE_SIZE", "10000"))
+ANNOUNCE_REDIS_DEDUPE = os.getenv("HIGH_TIER_REDIS_DEDUPE", "1") == "1"
 
 
 class HighTier(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.triggered_messages = {}
-        self.cleanup_triggered.start()
-
-    def cog_unload(self):
-        self.cleanup_triggered.cancel()
+        self.triggered_messages = SeenSet(ANNOUNCE_MAX_TRACKED, ANNOUNCE_TTL_SECONDS)
 
     async def get_config(self, guild: discord.Guild):
         """Récupère la config serveur depuis le cog GuildConfig"""
@@ -48,18 +30,8 @@ class HighTier(commands.Cog):
         return None
 
     async def check_cooldown(self, user_id: int, cooldown: int) -> int:
-        """Cooldown stocké en Redis par utilisateur"""
-        if not getattr(self.bot, "redis", None):
-            return 0
-        key = f"cooldown:high-tier:{user_id}"
-        last_ts = await self.bot.redis.get(key)
-        now = int(time.time())
-        if last_ts:
-            elapsed = now - int(last_ts)
-            if elapsed < cooldown:
-                return cooldown - elapsed
-        await self.bot.redis.set(key, str(now))
-        return 0
+        """Cooldown par utilisateur (script Lua atomique, clé auto-expirée)"""
+        return await self.bot.ratelimits.cooldown(f"cooldown:high-tier:{user_id}", cooldown)
 
     # --- Slash command /high-tier ---
     @app_commands.command(name="high-tier", description="Get the High Tier role to be notified of rare spawn")
@@ -148,53 +120,47 @@ class HighTier(commands.Cog):
         except discord.Forbidden:
             await interaction.response.send_message("❌ Missing permissions to remove the role.", ephemeral=True)
 
-    # --- Cleanup task ---
-    @tasks.loop(minutes=30)
-    async def cleanup_triggered(self):
-        now = time.time()
-        self.triggered_messages = {
-            mid: ts for mid, ts in self.triggered_messages.items()
-            if now - ts < 6 * 3600
-        }
-
-    @cleanup_triggered.before_loop
-    async def before_cleanup_triggered(self):
-        await self.bot.wait_until_ready()
+    async def claim_announcement(self, message_id: int) -> bool:
+        """True si ce process doit annoncer le spawn : une seule fois par message et par bot, tous réplicas confondus.
+
+        La clé inclut l'application : deux bots (multi-bots, ou white-label sur le même Redis)
+        présents dans un serveur annoncent chacun le spawn pour leur propre rôle.
+        """
+        if not self.triggered_messages.add(message_id):
+            return False
+        redis = getattr(self.bot, "redis", None)
+        if not ANNOUNCE_REDIS_DEDUPE or not redis:
+            return True
+        try:
+            return bool(await redis.set(f"high-tier:announced:{self.bot.application_id}:{message_id}", 1, nx=True, ex=ANNOUNCE_TTL_SECONDS))
+        except Exception as e:
+            log.warning("⚠️ Redis dedupe unavailable, falling back to local: %s", e)
+            return True
 
     # --- Event listener ---
     @commands.Cog.listener()
-    async def on_message_edit(self, before: discord.Message, after: discord.Message):
-        if not after.guild or not after.embeds:
+    async def on_auto_summon(self, event: AutoSummon):
+        if event.message_id in self.triggered_messages:
             return
-        if after.id in self.triggered_messages:
+        if not self.bot.subscriptions.allows(event.guild.id):
             return
 
-        embed = after.embeds[0]
-        title = (embed.title or "").lower()
-        desc = (embed.description or "")
-
-        if "auto summon" not in title:
-            return
-
-        found_rarity = None
-        highest_priority = 0
-        for emoji_id, rarity in RARITY_EMOJIS.items():
-            if str(emoji_id) in desc:
-                if RARITY_PRIORITY[rarity] > highest_priority:
-                    found_rarity = rarity
-                    highest_priority = RARITY_PRIORITY[rarity]
-
-        if found_rarity:
-            config = await self.get_config(after.guild)
-            role_id = config.get("high_tier_role_id") if config else None
-            role = after.guild.get_role(role_id) if role_id else None
-
-            if role:
-                self.triggered_messages[after.id] = time.time()
-                emoji = RARITY_CUSTOM_EMOJIS.get(found_rarity, "🌸")
-                msg = RARITY_MESSAGES[found_rarity].format(emoji=emoji)
-                await after.channel.send(f"{msg}\n🔥 {role.mention}")
-
+        with HANDLER_LATENCY.time(cog="HighTier", event="auto_summon"):
+            # Config en cache (TTL + invalidation) ; matcher compilé une fois par jeu de règles
+            config = await self.get_config(event.guild) or {}
+            rule = matcher_for(config.get("rarity_rules")).match(event.description)
+            if not rule:
+                return
+
+            role_id = rule.role_id or config.get("high_tier_role_id")
+            role = event.guild.get_role(role_id) if role_id else None
+            if not role:
+                return
+            if not await self.claim_announcement(event.message_id):
+                return
+
+        msg = rule.render()
+        await self.bot.outbound.send(event.channel, f"{msg}\n🔥 {role.mention}", priority=PRIORITY_HIGH_TIER)
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(HighTier(bot))
@@ -0,0 +1,67 @@
+import os
+import logging
+from aiohttp import web
+from discord.ext import commands
+from core import metrics
+
+log = logging.getLogger("cog-metrics")
+
+# Port du endpoint /metrics (vide = désactivé)
+METRICS_PORT = os.getenv("METRICS_PORT")
+METRICS_HOST = os.getenv("METRICS_HOST", "0.0.0.0")
+
+
+class Metrics(commands.Cog):
+    """Expose les métriques Prometheus sur http://METRICS_HOST:METRICS_PORT/metrics"""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.runner: web.AppRunner | None = None
+
+    async def cog_load(self):
+        # Multi-bots : un seul registre Prometheus par process, agrégé sur tous les clients
+        if self.bot is not self.bot.tenants[0]:
+            return
+        metrics.GUILDS.set_function(lambda: sum(len(bot.guilds) for bot in self.bot.tenants))
+        metrics.SHARDS.set_function(lambda: sum(bot.shard_count or 1 for bot in self.bot.tenants))
+        metrics.ACTIVE_REMINDERS.set_function(self.active_reminders)
+        metrics.OUTBOUND_QUEUE_DEPTH.set_function(self.outbound_depth)
+        metrics.instrument_discord_rate_limits()
+
+        if not METRICS_PORT:
+            return
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, METRICS_HOST, int(METRICS_PORT)).start()
+        log.info("📈 Metrics endpoint listening on %s:%s/metrics", METRICS_HOST, METRICS_PORT)
+
+    async def cog_unload(self):
+        if self.runner:
+            await self.runner.cleanup()
+
+    async def active_reminders(self) -> dict:
+        counts: dict[tuple, int] = {}
+        for bot in self.bot.tenants:
+            if not hasattr(bot, "reminders"):
+                continue
+            for kind in bot.reminders.kinds:
+                counts[(kind,)] = counts.get((kind,), 0) + await bot.reminders.count(kind)
+        return counts
+
+    def outbound_depth(self) -> dict:
+        depths: dict[tuple, int] = {}
+        for bot in self.bot.tenants:
+            if not hasattr(bot, "outbound"):
+                continue
+            for priority, depth in bot.outbound.depth().items():
+                depths[(priority,)] = depths.get((priority,), 0) + depth
+        return depths
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=await metrics.render(), content_type="text/plain", charset="utf-8")
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Metrics(bot))
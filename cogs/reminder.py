@@ -1,152 +1,99 @@
 import os
-import logging
 import asyncio
-import time
-import re
+import logging
 import discord
-from discord.ext import commands, tasks
-import asyncpg
+from discord.ext import commands
 from datetime import datetime, timedelta, timezone
+from core.embeds import SummonClaimed
+from core.outbound import PRIORITY_REMINDER
+from core.metrics import HANDLER_LATENCY
+from core.reminders import ReminderKind
 
 log = logging.getLogger("cog-reminder")
 
 COOLDOWN_SECONDS = int(os.getenv("COOLDOWN_SECONDS", "1800"))  # 30 min
-REMINDER_CLEANUP_MINUTES = int(os.getenv("REMINDER_CLEANUP_MINUTES", "10"))
-BOT_NAME = "Moonquil"   # ou "MemAssistant"
 TASK_NAME = "Reminder"  # nom du cog
 
+# Regroupement des rappels d'un même salon
+REMINDER_COALESCE_SECONDS = float(os.getenv("REMINDER_COALESCE_SECONDS", "1.5"))
+REMINDER_MAX_MENTIONS = int(os.getenv("REMINDER_MAX_MENTIONS", "25"))
+MESSAGE_MAX_LENGTH = 2000
+REMINDER_PREFIX = "⏱️ Hey "
+REMINDER_SUFFIX = ", your </summon:1301277778385174601> is available <:KDYEY:1438589525537591346>"
+
 class Reminder(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.active_reminders = {}
-        self.pool: asyncpg.Pool | None = None
-        self.cleanup_task.start()
+        self._pending_sends: dict[int, list[int]] = {}  # channel_id -> user_ids en attente de regroupement
 
     async def cog_load(self):
-        self.pool = self.bot.db_pool
-        log.info("✅ Pool Postgres attachée pour Reminder (%s)", BOT_NAME)
+        self.bot.reminders.register(ReminderKind(TASK_NAME, self.fire_reminder))
+        log.info("✅ Reminder kind registered (%s)", self.bot.reminders.bot_name)
+
+    def build_reminder_messages(self, user_ids: list[int]) -> list[str]:
+        """Un message par paquet de mentions, dans les limites de mentions et de longueur Discord."""
+        messages, chunk, length = [], [], len(REMINDER_PREFIX) + len(REMINDER_SUFFIX)
+        for user_id in user_ids:
+            mention = f"<@{user_id}>"
+            if chunk and (len(chunk) >= REMINDER_MAX_MENTIONS or length + len(mention) + 1 > MESSAGE_MAX_LENGTH):
+                messages.append(REMINDER_PREFIX + " ".join(chunk) + REMINDER_SUFFIX)
+                chunk, length = [], len(REMINDER_PREFIX) + len(REMINDER_SUFFIX)
+            chunk.append(mention)
+            length += len(mention) + 1
+        if chunk:
+            messages.append(REMINDER_PREFIX + " ".join(chunk) + REMINDER_SUFFIX)
+        return messages
+
+    async def send_reminder_message(self, guild_id: int, user_ids: list[int], channel_id: int):
+        channel = self.bot.get_partial_messageable(channel_id, guild_id=guild_id)
+        for content in self.build_reminder_messages(user_ids):
+            try:
+                await self.bot.outbound.send(
+                    channel, content,
+                    priority=PRIORITY_REMINDER,
+                    allowed_mentions=discord.AllowedMentions(users=True)
+                )
+            except (discord.Forbidden, discord.NotFound):
+                log.warning("❌ Cannot send reminder in %s", channel_id)
+                return
+        log.info("⏰ Reminder sent to %s user(s) in %s", len(user_ids), channel_id)
 
-    def cog_unload(self):
-        self.cleanup_task.cancel()
+    async def fire_reminder(self, guild_id: int, user_id: int, channel_id: int):
+        """Appelé par le store quand le cooldown est écoulé (la ligne est déjà supprimée).
 
-    async def send_reminder_message(self, member: discord.Member, channel: discord.TextChannel):
-        content = (
-            f"⏱️ Hey {member.mention}, your </summon:1301277778385174601> "
-            f"is available <:KDYEY:1438589525537591346>"
-        )
-        try:
-            await channel.send(content, allowed_mentions=discord.AllowedMentions(users=True))
-            log.info("⏰ Reminder sent to %s in #%s", member.display_name, channel.name)
-        except discord.Forbidden:
-            log.warning("❌ Cannot send reminder in %s", channel.name)
+        Les rappels d'un même salon échus dans la fenêtre REMINDER_COALESCE_SECONDS
+        partent en un seul message : le premier arrivé attend et envoie pour tous.
+        """
+        pending = self._pending_sends.get(channel_id)
+        if pending is not None:
+            pending.append(user_id)
+            return
 
-    async def start_reminder(self, member: discord.Member, channel: discord.TextChannel):
-        key = f"{member.guild.id}:{member.id}"
-        if key in self.active_reminders:
+        self._pending_sends[channel_id] = [user_id]
+        try:
+            await asyncio.sleep(REMINDER_COALESCE_SECONDS)
+        finally:
+            user_ids = self._pending_sends.pop(channel_id)
+        await self.send_reminder_message(guild_id, user_ids, channel_id)
+
+    async def start_reminder(self, guild_id: int, user_id: int, channel_id: int):
+        # IDs seulement : pas de Member à résoudre (ni de fetch_member en mode lean) sur le chemin chaud
+        if await self.bot.reminders.is_active(TASK_NAME, guild_id, user_id):
             return
 
         expire_at = datetime.now(timezone.utc) + timedelta(seconds=COOLDOWN_SECONDS)
-        async with self.pool.acquire() as conn:
-            await conn.execute(
-                "INSERT INTO reminders (bot_name, task, guild_id, user_id, channel_id, expire_at) "
-                "VALUES ($1, $2, $3, $4, $5, $6) "
-                "ON CONFLICT (bot_name, task, guild_id, user_id) DO UPDATE SET channel_id=$5, expire_at=$6",
-                BOT_NAME, TASK_NAME, member.guild.id, member.id, channel.id, expire_at
-            )
-
-        async def reminder_task():
-            try:
-                await asyncio.sleep(COOLDOWN_SECONDS)
-                await self.send_reminder_message(member, channel)
-            finally:
-                self.active_reminders.pop(key, None)
-                async with self.pool.acquire() as conn:
-                    await conn.execute(
-                        "DELETE FROM reminders WHERE bot_name=$1 AND task=$2 AND guild_id=$3 AND user_id=$4",
-                        BOT_NAME, TASK_NAME, member.guild.id, member.id
-                    )
-                log.info("🗑️ Reminder deleted for %s", member.display_name)
-
-        self.active_reminders[key] = asyncio.create_task(reminder_task())
-        log.info("▶️ Reminder started for %s (%ss)", member.display_name, COOLDOWN_SECONDS)
-
-    async def restore_reminders(self):
-        async with self.pool.acquire() as conn:
-            rows = await conn.fetch(
-                "SELECT guild_id, user_id, channel_id, expire_at FROM reminders WHERE bot_name=$1 AND task=$2",
-                BOT_NAME, TASK_NAME
-            )
-        now = datetime.now(timezone.utc)
-
-        for row in rows:
-            remaining = (row["expire_at"] - now).total_seconds()
-            if remaining <= 0:
-                async with self.pool.acquire() as conn:
-                    await conn.execute(
-                        "DELETE FROM reminders WHERE bot_name=$1 AND task=$2 AND guild_id=$3 AND user_id=$4",
-                        BOT_NAME, TASK_NAME, row["guild_id"], row["user_id"]
-                    )
-                continue
-
-            guild = self.bot.get_guild(row["guild_id"])
-            if not guild:
-                continue
-            member = guild.get_member(row["user_id"])
-            if not member:
-                continue
-            channel = guild.get_channel(row["channel_id"])
-            if not channel:
-                continue
-
-            key = f"{guild.id}:{member.id}"
-
-            async def reminder_task():
-                try:
-                    await asyncio.sleep(remaining)
-                    await self.send_reminder_message(member, channel)
-                finally:
-                    self.active_reminders.pop(key, None)
-                    async with self.pool.acquire() as conn:
-                        await conn.execute(
-                            "DELETE FROM reminders WHERE bot_name=$1 AND task=$2 AND guild_id=$3 AND user_id=$4",
-                            BOT_NAME, TASK_NAME, guild.id, member.id
-                        )
-
-            self.active_reminders[key] = asyncio.create_task(reminder_task())
-            log.info("♻️ Restored reminder for %s (%ss left)", member.display_name, remaining)
-
-    @tasks.loop(minutes=REMINDER_CLEANUP_MINUTES)
-    async def cleanup_task(self):
-        async with self.pool.acquire() as conn:
-            await conn.execute(
-                "DELETE FROM reminders WHERE expire_at <= $1",
-                datetime.now(timezone.utc)
-            )
-        log.info("🧹 Cleanup: expired reminders deleted")
-
-    @cleanup_task.before_loop
-    async def before_cleanup(self):
-        await self.bot.wait_until_ready()
-        await self.restore_reminders()
+        await self.bot.reminders.start(TASK_NAME, guild_id, user_id, channel_id, expire_at)
+        log.info("▶️ Reminder started for %s (%ss)", user_id, COOLDOWN_SECONDS)
 
     @commands.Cog.listener()
-    async def on_message_edit(self, before: discord.Message, after: discord.Message):
-        if not after.guild or not after.embeds:
+    async def on_summon_claimed(self, event: SummonClaimed):
+        if not self.bot.subscriptions.allows(event.guild.id):
             return
-        embed = after.embeds[0]
-        title = (embed.title or "").lower()
-        desc = embed.description or ""
-        footer = embed.footer.text.lower() if embed.footer and embed.footer.text else ""
-        if "summon claimed" in title and "auto summon claimed" not in title:
-            match = re.search(r"<@!?(\d+)>", desc) or (re.search(r"<@!?(\d+)>", footer) if "claimed by" in footer else None)
-            if not match:
-                return
-            user_id = int(match.group(1))
-            member = after.guild.get_member(user_id)
-            if not member:
-                return
-            await self.start_reminder(member, after.channel)
+        if self.bot.reminder_optouts.is_opted_out(event.guild.id, event.user_id):
+            return
+        with HANDLER_LATENCY.time(cog="Reminder", event="summon_claimed"):
+            await self.start_reminder(event.guild.id, event.user_id, event.channel.id)
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(Reminder(bot))
-    log.info("⚙️ Reminder cog loaded (%s + Postgres)", BOT_NAME)
+    log.info("⚙️ Reminder cog loaded (%s + Postgres)", bot.reminders.bot_name)
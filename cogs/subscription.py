@@ -16,19 +16,17 @@ class ChildSubscription(commands.Cog):
     async def check_subscription(self, interaction: discord.Interaction):
         """Slash command to check the subscription expiration date for the current server."""
         server_id = interaction.guild.id
-        async with self.bot.db_pool.acquire() as conn:
-            row = await conn.fetchrow(
-                "SELECT expire_at FROM subscriptions WHERE server_id=$1",
-                server_id
-            )
+        if self.bot.subscriptions.loaded:
+            expire_at = self.bot.subscriptions.expire_at(server_id)
+        else:
+            expire_at = await self.bot.db.get_subscription_expiry(server_id)
 
-        if not row:
+        if not expire_at:
             await interaction.response.send_message(
                 f"⚠️ This server (`{server_id}`) does not have an active subscription.",
                 ephemeral=True
             )
         else:
-            expire_at = row["expire_at"]
             expire_str = expire_at.strftime("%Y-%m-%d %H:%M:%S UTC")
             await interaction.response.send_message(
                 f"✅ This server is subscribed until **{expire_str}**",
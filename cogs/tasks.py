@@ -1,8 +1,15 @@
+import os
+import sys
+import time
 import logging
 import asyncio
 import itertools
+import threading
+import traceback
+from collections import deque
 import discord
 from discord.ext import commands
+from core.metrics import LOOP_LAG, LOOP_LAG_QUANTILES, LOOP_LAG_ALERTS
 
 log = logging.getLogger("cog-tasks")
 
@@ -12,18 +19,89 @@ STATUSES = [
     discord.Activity(type=discord.ActivityType.listening, name="to the last hit🎵"),
 ]
 
+LAG_SAMPLE_INTERVAL = float(os.getenv("LAG_SAMPLE_INTERVAL", "0.5"))
+# Une interaction doit être acquittée en 3 s : on alerte bien avant
+LAG_ALERT_SECONDS = float(os.getenv("LAG_ALERT_SECONDS", "1.0"))
+HEARTBEAT_SECONDS = 60
+# Mode debug : slow callbacks asyncio + watchdog qui capture la stack de la boucle bloquée
+ASYNCIO_DEBUG = os.getenv("ASYNCIO_DEBUG", "0") == "1"
+SLOW_CALLBACK_SECONDS = float(os.getenv("SLOW_CALLBACK_SECONDS", "0.1"))
+
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class StallWatchdog(threading.Thread):
+    """Thread qui sonde la boucle ; si elle ne répond pas sous `threshold`, log la stack du thread de la boucle."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, threshold: float):
+        super().__init__(name="loop-stall-watchdog", daemon=True)
+        self.loop = loop
+        self.threshold = threshold
+        self.loop_thread_id = threading.get_ident()
+        self._stopped = threading.Event()
+
+    def stop(self):
+        self._stopped.set()
+
+    def run(self):
+        while not self._stopped.is_set():
+            ran = threading.Event()
+            started = time.monotonic()
+            try:
+                self.loop.call_soon_threadsafe(ran.set)
+            except RuntimeError:
+                return  # boucle fermée
+            if not ran.wait(self.threshold):
+                frame = sys._current_frames().get(self.loop_thread_id)
+                stack = "".join(traceback.format_stack(frame)) if frame else "<no frame>"
+                log.warning("🐢 Event loop blocked for more than %.3fs, current stack:\n%s", self.threshold, stack)
+                while not ran.wait(1) and not self._stopped.is_set():
+                    pass
+                log.warning("🐢 Event loop unblocked after %.3fs", time.monotonic() - started)
+            self._stopped.wait(self.threshold)
+
+
 class Tasks(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self._status_task = None
-        self._heartbeat_task = None
+        self._lag_task = None
+        self._watchdog: StallWatchdog | None = None
+        self.lag_samples: deque[float] = deque(maxlen=int(HEARTBEAT_SECONDS / LAG_SAMPLE_INTERVAL))
+
+    @property
+    def monitors_loop(self) -> bool:
+        """Multi-bots : une seule boucle asyncio, surveillée par le premier client seulement."""
+        return self.bot is self.bot.tenants[0]
+
+    async def cog_load(self):
+        if not self.monitors_loop:
+            return
+        LOOP_LAG_QUANTILES.set_function(self.lag_quantiles)
+        if ASYNCIO_DEBUG:
+            loop = asyncio.get_running_loop()
+            loop.set_debug(True)
+            loop.slow_callback_duration = SLOW_CALLBACK_SECONDS
+            self._watchdog = StallWatchdog(loop, SLOW_CALLBACK_SECONDS)
+            self._watchdog.start()
+            log.warning("🐞 asyncio debug on: slow callbacks > %ss are reported with stacks", SLOW_CALLBACK_SECONDS)
+
+    def cog_unload(self):
+        if self._lag_task:
+            self._lag_task.cancel()
+        if self._watchdog:
+            self._watchdog.stop()
 
     @commands.Cog.listener()
     async def on_ready(self):
         if not self._status_task:
             self._status_task = asyncio.create_task(self.cycle_status())
-        if not self._heartbeat_task:
-            self._heartbeat_task = asyncio.create_task(self.heartbeat())
+        if not self._lag_task and self.monitors_loop:
+            self._lag_task = asyncio.create_task(self.monitor_loop_lag())
         log.info("✅ Background tasks launched")
 
     async def cycle_status(self):
@@ -34,11 +112,36 @@ class Tasks(commands.Cog):
                 log.exception("Failed to change presence")
             await asyncio.sleep(300)
 
-    async def heartbeat(self):
+    def lag_quantiles(self) -> dict:
+        ordered = sorted(self.lag_samples)
+        return {(str(q / 100),): _percentile(ordered, q) for q in (50, 95, 99)}
+
+    async def monitor_loop_lag(self):
+        """Mesure le retard des réveils planifiés (remplace l'ancien heartbeat)."""
+        loop = asyncio.get_running_loop()
+        last_report = loop.time()
         while True:
-            log.info("💓 Heartbeat: bot alive")
-            await asyncio.sleep(60)
+            start = loop.time()
+            await asyncio.sleep(LAG_SAMPLE_INTERVAL)
+            now = loop.time()
+            lag = max(0.0, now - start - LAG_SAMPLE_INTERVAL)
+            self.lag_samples.append(lag)
+            LOOP_LAG.observe(lag)
+
+            if lag >= LAG_ALERT_SECONDS:
+                LOOP_LAG_ALERTS.inc()
+                log.warning("⚠️ Event loop lag %.3fs, slash command interactions risk missing the 3s deadline", lag)
+
+            if now - last_report >= HEARTBEAT_SECONDS:
+                last_report = now
+                ordered = sorted(self.lag_samples)
+                outbound = getattr(self.bot, "outbound", None)
+                log.info(
+                    "💓 Heartbeat: loop lag p50=%.1fms p95=%.1fms p99=%.1fms max=%.1fms%s",
+                    _percentile(ordered, 50) * 1000, _percentile(ordered, 95) * 1000,
+                    _percentile(ordered, 99) * 1000, ordered[-1] * 1000,
+                    f" | outbound {outbound.stats()}" if outbound else ""
+                )
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(Tasks(bot))
-
@@ -0,0 +1,83 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+MISSING = object()
+
+
+class TTLCache:
+    """Cache LRU borné dont chaque entrée expire après `ttl` secondes."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires, value = item
+        if expires <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.pop(key, None)
+        return item[1] if item else default
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not MISSING
+
+
+class SeenSet:
+    """Ensemble borné de clés déjà vues, expirant après `ttl` secondes.
+
+    L'ordre d'insertion est aussi l'ordre d'expiration (TTL fixe, pas de move_to_end) :
+    la purge ne lit que la tête de l'OrderedDict, O(1) amorti par insertion.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, float] = OrderedDict()
+
+    def _purge(self, now: float):
+        data = self._data
+        while data:
+            key, expires = next(iter(data.items()))
+            if expires > now:
+                break
+            del data[key]
+
+    def add(self, key: Hashable) -> bool:
+        """Ajoute la clé. Retourne False si elle était déjà présente (et non expirée)."""
+        now = time.monotonic()
+        self._purge(now)
+        if key in self._data:
+            return False
+        self._data[key] = now + self.ttl
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        expires = self._data.get(key)
+        return expires is not None and expires > time.monotonic()
@@ -0,0 +1,54 @@
+import os
+import json
+import hashlib
+import logging
+
+from discord import app_commands
+
+log = logging.getLogger("core-commandsync")
+
+# 1 = sync global à chaque démarrage, même si l'arbre n'a pas changé
+FORCE_COMMAND_SYNC = os.getenv("FORCE_COMMAND_SYNC", "0") == "1"
+
+
+def tree_hash(tree: app_commands.CommandTree) -> str:
+    """Hash stable du payload que `tree.sync()` enverrait pour les commandes globales."""
+    payload = []
+    for command in tree.get_commands():
+        try:
+            payload.append(command.to_dict(tree))
+        except TypeError:  # discord.py < 2.4 : to_dict() sans argument
+            payload.append(command.to_dict())
+    payload.sort(key=lambda c: (c.get("type", 1), c["name"]))
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def _key(bot) -> str:
+    return f"command_tree_hash:{bot.application_id}"
+
+
+async def record_sync(bot):
+    """Mémorise le hash de l'arbre qui vient d'être synchronisé."""
+    if not getattr(bot, "redis", None):
+        return
+    try:
+        await bot.redis.set(_key(bot), tree_hash(bot.tree))
+    except Exception as e:
+        log.warning("⚠️ Cannot store command tree hash: %s", e)
+
+
+async def sync_if_changed(bot) -> list | None:
+    """Sync global seulement si l'arbre diffère du dernier sync. Retourne None si rien n'a été envoyé."""
+    current = tree_hash(bot.tree)
+    if not FORCE_COMMAND_SYNC and getattr(bot, "redis", None):
+        try:
+            if await bot.redis.get(_key(bot)) == current:
+                log.info("🌍 Command tree unchanged (%s…), global sync skipped", current[:12])
+                return None
+        except Exception as e:
+            log.warning("⚠️ Cannot read command tree hash, syncing anyway: %s", e)
+
+    synced = await bot.tree.sync()
+    await record_sync(bot)
+    return synced
@@ -0,0 +1,224 @@
+import os
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator
+
+import asyncpg
+from core.metrics import DB_ACQUIRE_WAIT, DB_QUERY_TIME
+from core.migrations import REMINDERS_PARTITIONED, migrate, maintain_reminder_partitions
+
+log = logging.getLogger("core-database")
+
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "5"))
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "5000"))
+DB_COMMAND_TIMEOUT = float(os.getenv("DB_COMMAND_TIMEOUT", "10"))
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+SLOW_QUERY_SECONDS = float(os.getenv("SLOW_QUERY_SECONDS", "0.2"))
+DB_POOL_CLOSE_TIMEOUT = 10
+
+# --- Requêtes (texte constant => préparées une fois par connexion par le cache asyncpg) ---
+SQL = {
+    "ping": "SELECT 1",
+    "reminders.stream": (
+        "SELECT task, guild_id, user_id, channel_id, expire_at, recurrence FROM reminders WHERE bot_name=$1"
+    ),
+    "reminders.stream_shards": (
+        "SELECT task, guild_id, user_id, channel_id, expire_at, recurrence FROM reminders "
+        "WHERE bot_name=$1 AND (guild_id >> 22) % $2 = ANY($3::bigint[])"
+    ),
+    # Les rappels récurrents sont réécrits à chaque envoi : on ne purge que les uniques
+    "reminders.delete_expired": "DELETE FROM reminders WHERE expire_at <= $1 AND recurrence IS NULL",
+    "reminders.staging": (
+        "CREATE TEMP TABLE IF NOT EXISTS reminders_staging ("
+        "bot_name text, task text, guild_id bigint, user_id bigint, "
+        "channel_id bigint, expire_at timestamptz, recurrence interval) ON COMMIT DELETE ROWS"
+    ),
+    # DELETE + INSERT plutôt que ON CONFLICT : en mode partitionné, expire_at fait partie
+    # de la clé primaire et ne peut plus servir de cible d'upsert sur (bot_name, task, guild, user)
+    "reminders.clear_staged": (
+        "DELETE FROM reminders r USING reminders_staging s "
+        "WHERE r.bot_name=s.bot_name AND r.task=s.task "
+        "AND r.guild_id=s.guild_id AND r.user_id=s.user_id"
+    ),
+    "reminders.insert_staged": (
+        "INSERT INTO reminders (bot_name, task, guild_id, user_id, channel_id, expire_at, recurrence) "
+        "SELECT bot_name, task, guild_id, user_id, channel_id, expire_at, recurrence FROM reminders_staging"
+    ),
+    "reminders.delete_keys": (
+        "DELETE FROM reminders r "
+        "USING unnest($1::text[], $2::text[], $3::bigint[], $4::bigint[]) "
+        "AS d(bot_name, task, guild_id, user_id) "
+        "WHERE r.bot_name=d.bot_name AND r.task=d.task "
+        "AND r.guild_id=d.guild_id AND r.user_id=d.user_id"
+    ),
+    "guild_config.get": (
+        "SELECT guild_id, high_tier_role_id, required_role_id, rarity_rules FROM guild_config WHERE guild_id = $1"
+    ),
+    "guild_config.set_high_tier_role": (
+        "INSERT INTO guild_config (guild_id, high_tier_role_id) VALUES ($1, $2) "
+        "ON CONFLICT (guild_id) DO UPDATE "
+        "SET high_tier_role_id = EXCLUDED.high_tier_role_id, updated_at = CURRENT_TIMESTAMP"
+    ),
+    "guild_config.set_required_role": (
+        "INSERT INTO guild_config (guild_id, required_role_id) VALUES ($1, $2) "
+        "ON CONFLICT (guild_id) DO UPDATE "
+        "SET required_role_id = EXCLUDED.required_role_id, updated_at = CURRENT_TIMESTAMP"
+    ),
+    "guild_config.set_rarity_rules": (
+        "INSERT INTO guild_config (guild_id, rarity_rules) VALUES ($1, $2::jsonb) "
+        "ON CONFLICT (guild_id) DO UPDATE "
+        "SET rarity_rules = EXCLUDED.rarity_rules, updated_at = CURRENT_TIMESTAMP"
+    ),
+    "subscriptions.get_expiry": "SELECT expire_at FROM subscriptions WHERE server_id=$1",
+}
+# Texte SQL -> nom, pour étiqueter les métriques et le log des requêtes lentes
+STATEMENT_NAMES = {sql: name for name, sql in SQL.items()}
+
+
+def _log_query(record):
+    name = STATEMENT_NAMES.get(record.query, "other")
+    DB_QUERY_TIME.observe(record.elapsed, statement=name, status="error" if record.exception else "ok")
+    if record.elapsed >= SLOW_QUERY_SECONDS:
+        log.warning("🐢 Slow query %s took %.3fs", name, record.elapsed)
+
+
+async def _init_connection(conn: asyncpg.Connection):
+    conn.add_query_logger(_log_query)
+
+
+class Database:
+    """Couche d'accès unique : possède le pool asyncpg et expose des méthodes typées.
+
+    Les requêtes sont des constantes (`SQL`), donc préparées une seule fois par
+    connexion grâce au cache de statements asyncpg ; chacune est chronométrée et
+    soumise à `statement_timeout`.
+    """
+
+    def __init__(self, dsn: str | None, bot_name: str | None = None):
+        self.dsn = dsn
+        self.bot_name = bot_name  # propriétaire des données héritées (migrations)
+        self.pool: asyncpg.Pool | None = None
+
+    async def _create_pool(self) -> asyncpg.Pool:
+        return await asyncpg.create_pool(
+            dsn=self.dsn,
+            min_size=DB_POOL_MIN_SIZE,
+            max_size=DB_POOL_MAX_SIZE,
+            command_timeout=DB_COMMAND_TIMEOUT,
+            statement_cache_size=DB_STATEMENT_CACHE_SIZE,
+            server_settings={"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)},
+            init=_init_connection
+        )
+
+    async def connect(self):
+        self.pool = await self._create_pool()
+
+    async def reconnect(self):
+        """Ouvre un nouveau pool, le met en service, puis ferme l'ancien."""
+        old, self.pool = self.pool, await self._create_pool()
+        if old:
+            try:
+                await asyncio.wait_for(old.close(), DB_POOL_CLOSE_TIMEOUT)
+            except Exception:
+                old.terminate()
+
+    async def ping(self):
+        """Health check sur une connexion dédiée : un pool saturé n'est pas une panne de Postgres."""
+        conn = await asyncpg.connect(dsn=self.dsn)
+        try:
+            await conn.fetchval(SQL["ping"])
+        finally:
+            await conn.close()
+
+    async def migrate(self):
+        """Migrations sur une connexion dédiée, sans statement_timeout ni command_timeout du pool :
+        l'attente du verrou (workers qui démarrent ensemble) et les copies de grosses tables
+        ne doivent pas être annulées.
+        """
+        conn = await asyncpg.connect(dsn=self.dsn, server_settings={"statement_timeout": "0"})
+        try:
+            await migrate(conn, self.bot_name)
+        finally:
+            await conn.close()
+
+    async def close(self):
+        if self.pool:
+            await self.pool.close()
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[asyncpg.Connection]:
+        if self.pool is None:
+            raise RuntimeError("Postgres pool unavailable")
+        start = time.perf_counter()
+        async with self.pool.acquire() as conn:
+            DB_ACQUIRE_WAIT.observe(time.perf_counter() - start)
+            yield conn
+
+    async def execute(self, name: str, *args) -> str:
+        async with self.acquire() as conn:
+            return await conn.execute(SQL[name], *args)
+
+    async def fetchrow(self, name: str, *args) -> asyncpg.Record | None:
+        async with self.acquire() as conn:
+            return await conn.fetchrow(SQL[name], *args)
+
+    async def stream(self, name: str, *args, prefetch: int = 1000) -> AsyncIterator[asyncpg.Record]:
+        """Parcourt un résultat via un curseur serveur (une connexion, une transaction)."""
+        async with self.acquire() as conn:
+            async with conn.transaction():
+                async for row in conn.cursor(SQL[name], *args, prefetch=prefetch):
+                    yield row
+
+    # --- reminders (bot_name, task, guild_id, user_id), tous types confondus ---
+    def stream_reminders(self, bot_name: str, prefetch: int = 1000, shards: tuple[int, list[int]] | None = None):
+        """`shards` = (shard_count, shard_ids) : ne lit que les serveurs de ces shards."""
+        if shards:
+            return self.stream("reminders.stream_shards", bot_name, *shards, prefetch=prefetch)
+        return self.stream("reminders.stream", bot_name, prefetch=prefetch)
+
+    async def delete_expired_reminders(self, now: datetime):
+        """Mode partitionné : DROP des jours expirés, le DELETE ne touche plus que la partition du jour."""
+        if REMINDERS_PARTITIONED:
+            async with self.acquire() as conn:
+                await maintain_reminder_partitions(conn, now)
+        await self.execute("reminders.delete_expired", now)
+
+    async def apply_reminder_writes(self, upserts: list[tuple], deletes: list[list]):
+        """Upserts via COPY + table de staging, deletes via unnest, en une transaction."""
+        async with self.acquire() as conn:
+            async with conn.transaction():
+                if upserts:
+                    await conn.execute(SQL["reminders.staging"])
+                    await conn.copy_records_to_table(
+                        "reminders_staging",
+                        records=upserts,
+                        columns=["bot_name", "task", "guild_id", "user_id", "channel_id", "expire_at", "recurrence"]
+                    )
+                    await conn.execute(SQL["reminders.clear_staged"])
+                    await conn.execute(SQL["reminders.insert_staged"])
+                if deletes[0]:
+                    await conn.execute(SQL["reminders.delete_keys"], *deletes)
+
+    # --- guild_config ---
+    async def get_guild_config(self, guild_id: int) -> dict:
+        row = await self.fetchrow("guild_config.get", guild_id)
+        return dict(row) if row else {}
+
+    async def set_high_tier_role(self, guild_id: int, role_id: int):
+        await self.execute("guild_config.set_high_tier_role", guild_id, role_id)
+
+    async def set_required_role(self, guild_id: int, role_id: int):
+        await self.execute("guild_config.set_required_role", guild_id, role_id)
+
+    async def set_rarity_rules(self, guild_id: int, rules: str | None):
+        """`rules` : JSON (liste de règles) ou None pour revenir aux règles par défaut."""
+        await self.execute("guild_config.set_rarity_rules", guild_id, rules)
+
+    # --- subscriptions ---
+    async def get_subscription_expiry(self, server_id: int) -> datetime | None:
+        row = await self.fetchrow("subscriptions.get_expiry", server_id)
+        return row["expire_at"] if row else None
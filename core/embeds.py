@@ -0,0 +1,47 @@
+import re
+from dataclasses import dataclass
+
+import discord
+
+MENTION_RE = re.compile(r"<@!?(\d+)>")
+
+
+@dataclass(slots=True)
+class SummonClaimed:
+    """Un joueur vient de réclamer son /summon (dispatché en `on_summon_claimed`)."""
+    guild: discord.Guild
+    channel: discord.abc.Messageable
+    message_id: int
+    user_id: int
+
+
+@dataclass(slots=True)
+class AutoSummon:
+    """Embed d'auto summon, la description contient les émojis de rareté (`on_auto_summon`)."""
+    guild: discord.Guild
+    channel: discord.abc.Messageable
+    message_id: int
+    description: str
+
+
+def classify_embed(
+    guild: discord.Guild,
+    channel: discord.abc.Messageable,
+    message_id: int,
+    title: str,
+    description: str,
+    footer: str,
+) -> tuple[str, SummonClaimed | AutoSummon] | None:
+    """Classe un embed du bot de jeu une seule fois. Retourne (nom d'event, event) ou None."""
+    title = title.lower()
+    if "auto summon" in title:
+        return "auto_summon", AutoSummon(guild, channel, message_id, description)
+
+    if "summon claimed" in title:
+        match = MENTION_RE.search(description)
+        if not match and "claimed by" in footer.lower():
+            match = MENTION_RE.search(footer)
+        if match:
+            return "summon_claimed", SummonClaimed(guild, channel, message_id, int(match.group(1)))
+
+    return None
@@ -0,0 +1,146 @@
+import os
+import json
+import asyncio
+import logging
+from collections import deque
+from contextlib import suppress
+from typing import Any
+
+log = logging.getLogger("core-events")
+
+EVENT_STREAM = os.getenv("EVENT_STREAM", "bot_events")
+EVENT_STREAM_MAXLEN = int(os.getenv("EVENT_STREAM_MAXLEN", "100000"))
+EVENT_FLUSH_INTERVAL = float(os.getenv("EVENT_FLUSH_INTERVAL", "0.25"))  # secondes
+EVENT_BATCH_SIZE = int(os.getenv("EVENT_BATCH_SIZE", "100"))
+EVENT_BUFFER_MAX = int(os.getenv("EVENT_BUFFER_MAX", "10000"))
+# Redis indisponible : backoff exponentiel plafonné entre deux tentatives
+EVENT_MAX_BACKOFF = float(os.getenv("EVENT_MAX_BACKOFF", "30"))
+# Ancien canal pub/sub "bot_events" : actif par défaut tant que le Master n'a pas migré
+# vers le consumer group (à passer à 0, puis retirer, une fois le Master à jour)
+EVENT_PUBSUB_MIRROR = os.getenv("EVENT_PUBSUB_MIRROR", "1") == "1"
+
+
+class EventBus:
+    """Émetteur d'événements vers le Master via un Redis Stream.
+
+    `emit` ne fait qu'ajouter au tampon ; une boucle écrit les lots avec des XADD
+    pipelinés (MAXLEN ~). Le Master lit via un consumer group (`ensure_group`,
+    `read`, `ack`) et ne perd plus rien pendant une déconnexion.
+    """
+
+    def __init__(self, redis):
+        self.redis = redis
+        self._buffer: deque[dict[str, Any]] = deque(maxlen=EVENT_BUFFER_MAX)
+        self._flush_now = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._failures = 0
+        self.dropped = 0
+
+    def use_redis(self, redis):
+        """Bascule sur un nouveau client (reconnexion) ; le tampon en attente est conservé."""
+        self.redis = redis
+
+    def emit(self, bot_name: str, bot_id: int | None, guild_id: int, user_id: int,
+             event_type: str, details: dict | None = None):
+        if not self.redis:
+            return
+        event = {
+            "bot_name": bot_name,
+            "bot_id": bot_id,
+            "guild_id": guild_id,
+            "user_id": user_id,
+            "event_type": event_type,
+            "details": details or {}
+        }
+        if len(self._buffer) == self._buffer.maxlen:
+            # Un seul avertissement par épisode de saturation, le total est loggé au retour
+            if not self.dropped:
+                log.warning("⚠️ Event buffer full (%s), dropping oldest events", self._buffer.maxlen)
+            self.dropped += 1
+        self._buffer.append(event)
+        log.debug("📡 Event queued: %s", event)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="event-bus")
+        if len(self._buffer) >= EVENT_BATCH_SIZE:
+            self._flush_now.set()
+
+    async def _run(self):
+        while True:
+            if self._failures:
+                # Redis en échec : backoff exponentiel, les flushs anticipés sont ignorés
+                await asyncio.sleep(min(EVENT_FLUSH_INTERVAL * 2 ** min(self._failures, 16), EVENT_MAX_BACKOFF))
+            else:
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._flush_now.wait(), EVENT_FLUSH_INTERVAL)
+            self._flush_now.clear()
+            await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            while self._buffer:
+                batch = [self._buffer.popleft() for _ in range(min(EVENT_BATCH_SIZE, len(self._buffer)))]
+                try:
+                    async with self.redis.pipeline(transaction=False) as pipe:
+                        for event in batch:
+                            payload = json.dumps(event)
+                            pipe.xadd(
+                                EVENT_STREAM,
+                                {"event_type": event["event_type"], "data": payload},
+                                maxlen=EVENT_STREAM_MAXLEN,
+                                approximate=True
+                            )
+                            if EVENT_PUBSUB_MIRROR:
+                                pipe.publish(EVENT_STREAM, payload)
+                        await pipe.execute()
+                except asyncio.CancelledError:
+                    # Annulé pendant l'envoi (arrêt) : le lot revient en tête du tampon
+                    self._buffer.extendleft(reversed(batch))
+                    raise
+                except Exception as e:
+                    self._failures += 1
+                    if self._failures == 1:
+                        log.error("❌ Impossible de publier %s événements Redis: %s", len(batch), e)
+                    else:
+                        log.warning("⚠️ Event flush still failing (attempt %s, %s events buffered): %s",
+                                    self._failures, len(batch) + len(self._buffer), e)
+                    self._buffer.extendleft(reversed(batch))
+                    return
+                if self._failures:
+                    log.info("✅ Event bus recovered after %s failed attempts", self._failures)
+                    self._failures = 0
+                if self.dropped:
+                    log.warning("⚠️ %s events were dropped while the buffer was full", self.dropped)
+                    self.dropped = 0
+                log.debug("📡 %s events written to stream %s", len(batch), EVENT_STREAM)
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self.redis:
+            await self.flush()
+
+    # --- Côté consommateur (Master) ---
+    async def ensure_group(self, group: str, start_id: str = "0"):
+        try:
+            await self.redis.xgroup_create(EVENT_STREAM, group, id=start_id, mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def read(self, group: str, consumer: str, count: int = 100, block_ms: int = 5000):
+        """Retourne [(id, event)] non encore délivrés à ce groupe."""
+        response = await self.redis.xreadgroup(group, consumer, {EVENT_STREAM: ">"}, count=count, block=block_ms)
+        events = []
+        for _, entries in response or []:
+            for entry_id, fields in entries:
+                events.append((entry_id, json.loads(fields["data"])))
+        return events
+
+    async def ack(self, group: str, *entry_ids: str):
+        if entry_ids:
+            await self.redis.xack(EVENT_STREAM, group, *entry_ids)
@@ -0,0 +1,39 @@
+import os
+import logging
+import discord
+from core.cache import TTLCache, MISSING
+
+log = logging.getLogger("core-members")
+
+MEMBER_CACHE_SIZE = int(os.getenv("MEMBER_CACHE_SIZE", "2048"))
+MEMBER_CACHE_TTL = int(os.getenv("MEMBER_CACHE_TTL", "300"))  # 5 min
+
+
+class MemberResolver:
+    """Résout un Member à la demande quand le cache discord.py est désactivé.
+
+    Ordre : cache du guild -> petit LRU local -> `fetch_member` (résultat négatif mis en cache aussi).
+    """
+
+    def __init__(self):
+        self.cache = TTLCache(MEMBER_CACHE_SIZE, MEMBER_CACHE_TTL)
+
+    async def resolve(self, guild: discord.Guild, user_id: int) -> discord.Member | None:
+        member = guild.get_member(user_id)
+        if member:
+            return member
+
+        key = (guild.id, user_id)
+        member = self.cache.get(key)
+        if member is not MISSING:
+            return member
+
+        try:
+            member = await guild.fetch_member(user_id)
+        except discord.NotFound:
+            member = None
+        except discord.HTTPException as e:
+            log.warning("⚠️ fetch_member failed for %s in %s: %s", user_id, guild.id, e)
+            return None
+        self.cache.set(key, member)
+        return member
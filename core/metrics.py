@@ -0,0 +1,177 @@
+import time
+import bisect
+import logging
+import inspect
+from contextlib import contextmanager
+from typing import Awaitable, Callable
+
+# Registre Prometheus minimal (format texte 0.0.4), sans dépendance externe.
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{str(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, doc: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.doc = doc
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+        REGISTRY.append(self)
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    async def collect(self) -> list[str]:
+        return [f"{self.name}{_labels(self.labelnames, key)} {value}" for key, value in self._values.items()]
+
+
+class Gauge:
+    """Gauge dont la valeur est lue au scrape via un callback (sync ou async).
+
+    Le callback retourne soit un nombre, soit un dict {tuple de labels: valeur}.
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, doc: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.doc = doc
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+        self._callback: Callable[[], float | dict | Awaitable] | None = None
+        REGISTRY.append(self)
+
+    def set(self, value: float, **labels):
+        self._values[tuple(labels[name] for name in self.labelnames)] = value
+
+    def set_function(self, callback: Callable[[], float | dict | Awaitable]):
+        self._callback = callback
+
+    async def collect(self) -> list[str]:
+        values = dict(self._values)
+        if self._callback:
+            result = self._callback()
+            if inspect.isawaitable(result):
+                result = await result
+            if isinstance(result, dict):
+                values.update(result)
+            else:
+                values[()] = result
+        return [f"{self.name}{_labels(self.labelnames, key)} {value}" for key, value in values.items()]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.doc = doc
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # labels -> [compteurs par bucket (+Inf inclus), somme]
+        self._series: dict[tuple, list] = {}
+        REGISTRY.append(self)
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    async def collect(self) -> list[str]:
+        lines = []
+        for key, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+REGISTRY: list[Counter | Gauge | Histogram] = []
+
+
+async def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.doc}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(await metric.collect())
+    return "\n".join(lines) + "\n"
+
+
+# --- Métriques du bot ---
+HANDLER_LATENCY = Histogram(
+    "sunflower_event_handler_seconds", "Durée des handlers d'événements gateway par cog", ("cog", "event")
+)
+DB_ACQUIRE_WAIT = Histogram("sunflower_db_pool_acquire_seconds", "Attente pour obtenir une connexion asyncpg")
+DB_QUERY_TIME = Histogram("sunflower_db_query_seconds", "Durée des requêtes Postgres par statement", ("statement", "status"))
+REDIS_COMMAND_TIME = Histogram("sunflower_redis_command_seconds", "Durée des commandes Redis", ("command",))
+OUTBOUND_SEND_LATENCY = Histogram(
+    "sunflower_outbound_send_seconds", "Délai mise en file -> message envoyé", ("priority",)
+)
+OUTBOUND_RATE_LIMITED = Counter("sunflower_outbound_429_total", "Envois abandonnés sur rate limit (429 final ou RateLimited)")
+DISCORD_RATE_LIMITS = Counter("sunflower_discord_429_total", "429 reçus de Discord, y compris ceux réessayés par discord.py")
+OUTBOUND_QUEUE_DEPTH = Gauge("sunflower_outbound_queue_depth", "Messages en attente par priorité", ("priority",))
+ACTIVE_REMINDERS = Gauge("sunflower_active_reminders", "Rappels planifiés par type", ("kind",))
+LOOP_LAG = Histogram("sunflower_event_loop_lag_seconds", "Retard des réveils planifiés de la boucle asyncio")
+LOOP_LAG_QUANTILES = Gauge("sunflower_event_loop_lag_quantile_seconds", "Percentiles récents du lag de boucle", ("quantile",))
+LOOP_LAG_ALERTS = Counter("sunflower_event_loop_lag_alerts_total", "Lag au-dessus du seuil d'alerte (deadline interactions 3 s)")
+GUILDS = Gauge("sunflower_guilds", "Nombre de serveurs")
+SHARDS = Gauge("sunflower_shards", "Nombre de shards")
+
+
+# --- Instrumentation de discord.py ---
+class _RateLimitLogCounter(logging.Filter):
+    """discord.py réessaie les 429 dans son client HTTP et ne fait que les logger (WARNING)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING and "rate limit" in str(record.msg).lower():
+            DISCORD_RATE_LIMITS.inc()
+        return True
+
+
+_RATE_LIMIT_COUNTER = _RateLimitLogCounter()
+
+
+def instrument_discord_rate_limits():
+    """Compte les 429 via les logs de `discord.http` (idempotent)."""
+    logging.getLogger("discord.http").addFilter(_RATE_LIMIT_COUNTER)
+
+
+# --- Instrumentation des backends ---
+def instrument_redis(client):
+    """Chronomètre chaque commande Redis (scripts Lua compris) par nom de commande."""
+    execute_command = client.execute_command
+
+    async def timed_execute_command(*args, **options):
+        start = time.perf_counter()
+        try:
+            return await execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_TIME.observe(time.perf_counter() - start, command=str(args[0]).upper())
+
+    client.execute_command = timed_execute_command
+    return client
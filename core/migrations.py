@@ -0,0 +1,212 @@
+import os
+import logging
+from datetime import datetime, timedelta, timezone
+
+import asyncpg
+
+log = logging.getLogger("core-migrations")
+
+# Partitionnement de `reminders` par jour d'expiration : le cleanup devient un DROP de partition
+REMINDERS_PARTITIONED = os.getenv("REMINDERS_PARTITIONED", "0") == "1"
+REMINDER_PARTITION_DAYS_AHEAD = int(os.getenv("REMINDER_PARTITION_DAYS_AHEAD", "3"))
+MIGRATION_LOCK_ID = 0x53554E46  # pg_advisory_lock : un seul process migre à la fois
+
+# (version, description, SQL) — ne jamais modifier une migration déjà livrée, en ajouter une
+MIGRATIONS: list[tuple[int, str, str]] = [
+    (1, "base tables", """
+        CREATE TABLE IF NOT EXISTS reminders (
+            bot_name   text        NOT NULL,
+            task       text        NOT NULL,
+            guild_id   bigint      NOT NULL,
+            user_id    bigint      NOT NULL,
+            channel_id bigint      NOT NULL,
+            expire_at  timestamptz NOT NULL,
+            PRIMARY KEY (bot_name, task, guild_id, user_id)
+        );
+        CREATE TABLE IF NOT EXISTS daily_reminders (
+            guild_id   bigint      NOT NULL,
+            user_id    bigint      NOT NULL,
+            channel_id bigint      NOT NULL,
+            expire_at  timestamptz NOT NULL,
+            PRIMARY KEY (guild_id, user_id)
+        );
+        CREATE TABLE IF NOT EXISTS vote_reminders (
+            guild_id   bigint      NOT NULL,
+            user_id    bigint      NOT NULL,
+            channel_id bigint      NOT NULL,
+            expire_at  timestamptz NOT NULL,
+            PRIMARY KEY (guild_id, user_id)
+        );
+        CREATE TABLE IF NOT EXISTS guild_config (
+            guild_id          bigint PRIMARY KEY,
+            high_tier_role_id bigint,
+            required_role_id  bigint,
+            updated_at        timestamptz NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE IF NOT EXISTS subscriptions (
+            server_id bigint PRIMARY KEY,
+            expire_at timestamptz NOT NULL
+        );
+    """),
+    (2, "expire_at indexes", """
+        CREATE INDEX IF NOT EXISTS reminders_expire_at_idx ON reminders (expire_at);
+        CREATE INDEX IF NOT EXISTS daily_reminders_expire_at_idx ON daily_reminders (expire_at);
+        CREATE INDEX IF NOT EXISTS vote_reminders_expire_at_idx ON vote_reminders (expire_at);
+        CREATE INDEX IF NOT EXISTS subscriptions_expire_at_idx ON subscriptions (expire_at);
+    """),
+    # Les anciennes tables n'ont pas de bot_name : propriétaire = `sunflower.bot_name` (posé par
+    # `migrate`), échec explicite s'il n'est pas connu et qu'il y a des lignes à copier.
+    # Les tables sont renommées en *_migrated, pas supprimées (à supprimer à la main après vérification).
+    (3, "unified reminder store", """
+        ALTER TABLE reminders ADD COLUMN IF NOT EXISTS recurrence interval;
+        DO $$
+        BEGIN
+            IF coalesce(current_setting('sunflower.bot_name', true), '') = ''
+               AND (EXISTS (SELECT 1 FROM daily_reminders) OR EXISTS (SELECT 1 FROM vote_reminders)) THEN
+                RAISE EXCEPTION 'Owner of daily_reminders / vote_reminders unknown: set BOT_NAME (or LEGACY_BOT_NAME in multi-bot mode)';
+            END IF;
+        END $$;
+        INSERT INTO reminders (bot_name, task, guild_id, user_id, channel_id, expire_at)
+            SELECT current_setting('sunflower.bot_name'), 'Daily', guild_id, user_id, channel_id, expire_at
+            FROM daily_reminders
+            ON CONFLICT DO NOTHING;
+        INSERT INTO reminders (bot_name, task, guild_id, user_id, channel_id, expire_at)
+            SELECT current_setting('sunflower.bot_name'), 'Vote', guild_id, user_id, channel_id, expire_at
+            FROM vote_reminders
+            ON CONFLICT DO NOTHING;
+        ALTER TABLE daily_reminders RENAME TO daily_reminders_migrated;
+        ALTER TABLE vote_reminders RENAME TO vote_reminders_migrated;
+    """),
+    (4, "subscriptions_changed notifications", """
+        CREATE OR REPLACE FUNCTION notify_subscriptions_changed() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                PERFORM pg_notify('subscriptions_changed', OLD.server_id::text || ':');
+                RETURN OLD;
+            END IF;
+            IF TG_OP = 'UPDATE' AND OLD.server_id <> NEW.server_id THEN
+                PERFORM pg_notify('subscriptions_changed', OLD.server_id::text || ':');
+            END IF;
+            PERFORM pg_notify('subscriptions_changed',
+                              NEW.server_id::text || ':' || extract(epoch FROM NEW.expire_at)::text);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+        DROP TRIGGER IF EXISTS subscriptions_changed ON subscriptions;
+        CREATE TRIGGER subscriptions_changed
+            AFTER INSERT OR UPDATE OR DELETE ON subscriptions
+            FOR EACH ROW EXECUTE FUNCTION notify_subscriptions_changed();
+    """),
+    (5, "per-guild rarity rules", """
+        ALTER TABLE guild_config ADD COLUMN IF NOT EXISTS rarity_rules jsonb;
+    """),
+]
+
+
+async def migrate(conn: asyncpg.Connection, bot_name: str | None = None):
+    """Applique les migrations manquantes (chacune dans sa transaction), puis prépare les partitions.
+
+    `bot_name` : propriétaire des données héritées sans colonne bot_name (migration 3).
+    """
+    await conn.execute("SELECT set_config('sunflower.bot_name', $1, false)", bot_name or "")
+    await conn.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_ID)
+    try:
+        await conn.execute(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version int PRIMARY KEY, description text NOT NULL, "
+            "applied_at timestamptz NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+        )
+        applied = {row["version"] for row in await conn.fetch("SELECT version FROM schema_migrations")}
+        for version, description, sql in MIGRATIONS:
+            if version in applied:
+                continue
+            async with conn.transaction():
+                await conn.execute(sql)
+                await conn.execute(
+                    "INSERT INTO schema_migrations (version, description) VALUES ($1, $2)",
+                    version, description
+                )
+            log.info("🗄️ Migration %s applied: %s", version, description)
+
+        if REMINDERS_PARTITIONED:
+            await partition_reminders(conn)
+            await maintain_reminder_partitions(conn, datetime.now(timezone.utc))
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_ID)
+
+
+def _partition_name(day: datetime) -> str:
+    return f"reminders_p{day:%Y%m%d}"
+
+
+async def partition_reminders(conn: asyncpg.Connection):
+    """Convertit `reminders` en table partitionnée par RANGE (expire_at) si ce n'est pas déjà fait.
+
+    La clé primaire d'une table partitionnée doit inclure la clé de partition :
+    elle devient (bot_name, task, guild_id, user_id, expire_at).
+    """
+    relkind = await conn.fetchval("SELECT relkind FROM pg_class WHERE oid = to_regclass('reminders')")
+    if relkind == "p":
+        return
+
+    async with conn.transaction():
+        await conn.execute("ALTER TABLE reminders RENAME TO reminders_legacy")
+        await conn.execute("ALTER INDEX IF EXISTS reminders_expire_at_idx RENAME TO reminders_legacy_expire_at_idx")
+        await conn.execute("""
+            CREATE TABLE reminders (
+                bot_name   text        NOT NULL,
+                task       text        NOT NULL,
+                guild_id   bigint      NOT NULL,
+                user_id    bigint      NOT NULL,
+                channel_id bigint      NOT NULL,
+                expire_at  timestamptz NOT NULL,
+                recurrence interval,
+                CONSTRAINT reminders_partitioned_pkey PRIMARY KEY (bot_name, task, guild_id, user_id, expire_at)
+            ) PARTITION BY RANGE (expire_at)
+        """)
+        await conn.execute("CREATE INDEX reminders_expire_at_idx ON reminders (expire_at)")
+        await conn.execute("CREATE TABLE reminders_default PARTITION OF reminders DEFAULT")
+        await maintain_reminder_partitions(conn, datetime.now(timezone.utc))
+        moved = await conn.execute(
+            "INSERT INTO reminders SELECT bot_name, task, guild_id, user_id, channel_id, expire_at, recurrence "
+            "FROM reminders_legacy WHERE expire_at > CURRENT_TIMESTAMP OR recurrence IS NOT NULL"
+        )
+        await conn.execute("DROP TABLE reminders_legacy")
+    log.info("🗄️ reminders converted to a partitioned table (%s live rows moved)", moved.split()[-1])
+
+
+async def maintain_reminder_partitions(conn: asyncpg.Connection, now: datetime) -> int:
+    """Crée les partitions des prochains jours et supprime celles entièrement expirées.
+
+    Une partition passée qui contient encore des rappels récurrents est gardée (comme
+    `reminders.delete_expired`) : ils sont replanifiés à la restauration.
+    Retourne le nombre de partitions supprimées.
+    """
+    today = now.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    for offset in range(REMINDER_PARTITION_DAYS_AHEAD + 1):
+        start = today + timedelta(days=offset)
+        try:
+            await conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {_partition_name(start)} PARTITION OF reminders "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{(start + timedelta(days=1)).isoformat()}')"
+            )
+        except asyncpg.PostgresError as e:
+            # Des lignes de cette plage dorment dans la partition DEFAULT : on la laisse les garder
+            log.warning("⚠️ Cannot create partition %s: %s", _partition_name(start), e)
+
+    partitions = await conn.fetch(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'reminders'::regclass AND c.relname LIKE 'reminders\\_p%'"
+    )
+    dropped = 0
+    for row in partitions:
+        day = datetime.strptime(row["relname"][len("reminders_p"):], "%Y%m%d").replace(tzinfo=timezone.utc)
+        # Borne haute <= minuit aujourd'hui : toutes les lignes sont expirées
+        if day + timedelta(days=1) <= today:
+            if await conn.fetchval(f"SELECT EXISTS (SELECT 1 FROM {row['relname']} WHERE recurrence IS NOT NULL)"):
+                continue
+            await conn.execute(f"DROP TABLE {row['relname']}")
+            dropped += 1
+    if dropped:
+        log.info("🧹 Dropped %s expired reminder partition(s)", dropped)
+    return dropped
@@ -0,0 +1,216 @@
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import logging
+from collections import deque
+from typing import Any
+
+import discord
+from core.metrics import OUTBOUND_SEND_LATENCY, OUTBOUND_RATE_LIMITED
+
+log = logging.getLogger("core-outbound")
+
+# Classes de priorité (plus petit = plus urgent)
+PRIORITY_HIGH_TIER = 0   # ping de spawn rare
+PRIORITY_REMINDER = 1    # /summon disponible
+PRIORITY_ROUTINE = 2     # daily / vote
+PRIORITY_NAMES = ("high_tier", "reminder", "routine")
+
+# Limite Discord par salon ≈ 5 messages / 5 s, et 50 requêtes/s globales
+CHANNEL_RATE = float(os.getenv("OUTBOUND_CHANNEL_RATE", "1"))        # jetons/s
+CHANNEL_BURST = float(os.getenv("OUTBOUND_CHANNEL_BURST", "5"))
+GLOBAL_RATE = float(os.getenv("OUTBOUND_GLOBAL_RATE", "45"))
+GLOBAL_BURST = float(os.getenv("OUTBOUND_GLOBAL_BURST", "45"))
+MAX_IDLE_BUCKETS = 1024
+LATENCY_SAMPLES = 1024
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Prend un jeton. Retourne 0 si c'est fait, sinon le temps d'attente avant le prochain."""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity
+
+
+class PriorityGate:
+    """Token bucket partagé dont les jetons sont attribués par priorité.
+
+    Les tâches de vidage des salons attendent leur tour dans un tas (priorité, ordre
+    d'arrivée) : quand le bucket global est saturé, un ping High Tier passe devant
+    les daily/vote en attente dans d'autres salons.
+    """
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self._waiters: list = []
+        self._counter = itertools.count()
+        self._task: asyncio.Task | None = None
+
+    async def acquire(self, priority: int):
+        if not self._waiters and not self.bucket.reserve():
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._grant())
+        await future
+
+    async def _grant(self):
+        waiters = self._waiters
+        while waiters:
+            wait = self.bucket.reserve()
+            if wait:
+                await asyncio.sleep(wait)
+                continue
+            _, _, future = heapq.heappop(waiters)
+            if future.done():
+                self.bucket.tokens += 1  # attente annulée : le jeton est rendu
+                continue
+            future.set_result(None)
+
+
+class _Outgoing:
+    __slots__ = ("channel", "content", "kwargs", "future", "enqueued_at", "priority")
+
+    def __init__(self, channel, content, kwargs, future, priority):
+        self.channel = channel
+        self.content = content
+        self.kwargs = kwargs
+        self.future = future
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+
+
+class OutboundQueue:
+    """File d'envoi centrale : un token bucket par salon + un global, et des priorités.
+
+    Chaque salon avec des messages en attente a sa propre tâche de vidage, qui sert
+    toujours le message le plus prioritaire disponible au moment où un jeton se libère ;
+    le jeton global est lui aussi attribué par priorité entre les salons (PriorityGate).
+    """
+
+    def __init__(self):
+        self._queues: dict[int, list] = {}
+        self._tasks: dict[int, asyncio.Task] = {}
+        self._buckets: dict[int, TokenBucket] = {}
+        self._global = PriorityGate(TokenBucket(GLOBAL_RATE, GLOBAL_BURST))
+        self._counter = itertools.count()
+        self._depth = [0, 0, 0]
+        self.sent = 0
+        self.failed = 0
+        self.rate_limited = 0
+        self.latencies: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    async def send(self, channel: discord.abc.Messageable, content: str, *, priority: int = PRIORITY_ROUTINE, **kwargs: Any):
+        """Met le message en file et attend son envoi (lève les mêmes erreurs que `channel.send`)."""
+        future = asyncio.get_running_loop().create_future()
+        item = _Outgoing(channel, content, kwargs, future, priority)
+        channel_id = channel.id
+
+        queue = self._queues.setdefault(channel_id, [])
+        heapq.heappush(queue, (priority, next(self._counter), item))
+        self._depth[priority] += 1
+        if channel_id not in self._tasks:
+            self._tasks[channel_id] = asyncio.create_task(self._drain(channel_id))
+        return await future
+
+    def _bucket(self, channel_id: int) -> TokenBucket:
+        bucket = self._buckets.get(channel_id)
+        if bucket is None:
+            if len(self._buckets) >= MAX_IDLE_BUCKETS:
+                self._buckets = {cid: b for cid, b in self._buckets.items() if cid in self._queues or not b.full()}
+            bucket = self._buckets[channel_id] = TokenBucket(CHANNEL_RATE, CHANNEL_BURST)
+        return bucket
+
+    async def _drain(self, channel_id: int):
+        queue = self._queues[channel_id]
+        bucket = self._bucket(channel_id)
+        try:
+            while queue:
+                wait = bucket.reserve()
+                if wait:
+                    await asyncio.sleep(wait)
+                    continue
+                # Jeton global attribué par priorité entre tous les salons
+                await self._global.acquire(queue[0][0])
+
+                # Pop après l'attente : un message plus prioritaire arrivé entre-temps passe devant
+                _, _, item = heapq.heappop(queue)
+                self._depth[item.priority] -= 1
+                await self._deliver(item)
+        finally:
+            self._queues.pop(channel_id, None)
+            self._tasks.pop(channel_id, None)
+
+    async def _deliver(self, item: _Outgoing):
+        try:
+            message = await item.channel.send(item.content, **item.kwargs)
+        except discord.RateLimited as e:
+            # Attente demandée au-delà de max_ratelimit_timeout : discord.py abandonne sans HTTPException
+            self.failed += 1
+            self.rate_limited += 1
+            OUTBOUND_RATE_LIMITED.inc()
+            if not item.future.done():
+                item.future.set_exception(e)
+            return
+        except discord.HTTPException as e:
+            self.failed += 1
+            if e.status == 429:
+                self.rate_limited += 1
+                OUTBOUND_RATE_LIMITED.inc()
+            if not item.future.done():
+                item.future.set_exception(e)
+            return
+        except Exception as e:
+            self.failed += 1
+            if not item.future.done():
+                item.future.set_exception(e)
+            return
+
+        self.sent += 1
+        latency = time.monotonic() - item.enqueued_at
+        self.latencies.append(latency)
+        OUTBOUND_SEND_LATENCY.observe(latency, priority=PRIORITY_NAMES[item.priority])
+        if not item.future.done():
+            item.future.set_result(message)
+
+    def depth(self) -> dict[str, int]:
+        return dict(zip(PRIORITY_NAMES, self._depth))
+
+    def latency_percentile(self, pct: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "depth": self.depth(),
+            "sent": self.sent,
+            "failed": self.failed,
+            "rate_limited": self.rate_limited,
+            "latency_p50_ms": round(self.latency_percentile(50) * 1000, 1),
+            "latency_p95_ms": round(self.latency_percentile(95) * 1000, 1),
+        }
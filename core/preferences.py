@@ -0,0 +1,102 @@
+import asyncio
+import logging
+
+log = logging.getLogger("core-preferences")
+
+SETTINGS_PATTERN = "reminder:settings:*:summon"
+SETTINGS_CHANNEL = "reminder_settings"
+SCAN_COUNT = 1000
+
+
+class ReminderOptOuts:
+    """Index mémoire des utilisateurs ayant désactivé les rappels /summon.
+
+    Source de vérité : les clés Redis `reminder:settings:{guild}:{user}:summon` ("0" = off).
+    Chargé au démarrage (SCAN + MGET), puis tenu à jour par pub/sub entre process ;
+    la vérification sur le chemin des claims est un simple lookup O(1).
+    """
+
+    def __init__(self, redis):
+        self.redis = redis
+        self._opted_out: dict[int, set[int]] = {}
+        self._task: asyncio.Task | None = None
+
+    def is_opted_out(self, guild_id: int, user_id: int) -> bool:
+        users = self._opted_out.get(guild_id)
+        return users is not None and user_id in users
+
+    def _apply(self, guild_id: int, user_id: int, enabled: bool):
+        if enabled:
+            users = self._opted_out.get(guild_id)
+            if users is not None:
+                users.discard(user_id)
+                if not users:
+                    del self._opted_out[guild_id]
+        else:
+            self._opted_out.setdefault(guild_id, set()).add(user_id)
+
+    async def set_enabled(self, guild_id: int, user_id: int, enabled: bool):
+        value = "1" if enabled else "0"
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(f"reminder:settings:{guild_id}:{user_id}:summon", value)
+            pipe.publish(SETTINGS_CHANNEL, f"{guild_id}:{user_id}:{value}")
+            await pipe.execute()
+        self._apply(guild_id, user_id, enabled)
+
+    def use_redis(self, redis):
+        """Nouveau client : on relance l'écoute (abonnement + rechargement complet)."""
+        self.stop()
+        self.redis = redis
+        self._task = None
+        self.start()
+
+    def start(self):
+        if self.redis and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run(), name="reminder-optouts")
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    async def load(self):
+        opted_out: dict[int, set[int]] = {}
+        keys = []
+        async for key in self.redis.scan_iter(match=SETTINGS_PATTERN, count=SCAN_COUNT):
+            keys.append(key)
+            if len(keys) >= SCAN_COUNT:
+                await self._load_batch(keys, opted_out)
+                keys = []
+        if keys:
+            await self._load_batch(keys, opted_out)
+        self._opted_out = opted_out
+        log.info("📋 Reminder opt-outs loaded (%s users)", sum(len(u) for u in opted_out.values()))
+
+    async def _load_batch(self, keys: list[str], opted_out: dict[int, set[int]]):
+        for key, value in zip(keys, await self.redis.mget(keys)):
+            if value != "0":
+                continue
+            _, _, guild_id, user_id, _ = key.split(":")
+            opted_out.setdefault(int(guild_id), set()).add(int(user_id))
+
+    async def _run(self):
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                # Abonnement avant le chargement : aucune mise à jour perdue entre les deux
+                await pubsub.subscribe(SETTINGS_CHANNEL)
+                await self.load()
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    try:
+                        guild_id, user_id, value = message["data"].split(":")
+                        self._apply(int(guild_id), int(user_id), value != "0")
+                    except ValueError:
+                        log.warning("⚠️ Invalid reminder setting update: %r", message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error("❌ Reminder opt-out listener failed: %s", e)
+                await asyncio.sleep(5)
+            finally:
+                await pubsub.reset()
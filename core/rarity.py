@@ -0,0 +1,111 @@
+import re
+import json
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+
+log = logging.getLogger("core-rarity")
+
+MATCHER_CACHE_SIZE = 4096
+DEFAULT_MESSAGE = "{emoji} has summoned, claim it!"
+DEFAULT_EMOJI = "🌸"
+
+
+@dataclass(frozen=True, slots=True)
+class RarityRule:
+    rarity: str
+    emoji_ids: tuple[str, ...]        # IDs détectés dans l'embed du jeu
+    priority: int
+    message: str = DEFAULT_MESSAGE
+    emoji: str = DEFAULT_EMOJI        # émoji affiché dans le ping
+    role_id: int | None = None        # None = rôle High Tier du serveur
+
+    def render(self) -> str:
+        """Message du ping. Substitution littérale (pas de str.format sur un texte saisi par un admin)."""
+        return self.message.replace("{emoji}", self.emoji)
+
+    def to_dict(self) -> dict:
+        return {
+            "rarity": self.rarity,
+            "emoji_ids": list(self.emoji_ids),
+            "priority": self.priority,
+            "message": self.message,
+            "emoji": self.emoji,
+            "role_id": self.role_id,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RarityRule":
+        return cls(
+            rarity=data["rarity"],
+            emoji_ids=tuple(str(i) for i in data["emoji_ids"]),
+            priority=int(data["priority"]),
+            message=data.get("message") or DEFAULT_MESSAGE,
+            emoji=data.get("emoji") or DEFAULT_EMOJI,
+            role_id=int(data["role_id"]) if data.get("role_id") else None,
+        )
+
+
+# Règles par défaut (serveurs sans `rarity_rules`)
+DEFAULT_RULES = (
+    RarityRule("SR", ("1342202597389373530",), 1, DEFAULT_MESSAGE, "<a:SRsun:1437411200450302022>"),
+    RarityRule("SSR", ("1342202212948115510",), 2, DEFAULT_MESSAGE, "<a:SSRsun:1437411914316779591>"),
+    RarityRule("UR", ("1342202203515125801",), 3, "{emoji} has summoned, claim it!!", "<a:URsun:1437412024702341130>"),
+)
+
+
+class RarityMatcher:
+    """Toutes les règles d'un serveur compilées en une seule regex d'alternation.
+
+    Une passe `finditer` sur la description, quel que soit le nombre de paliers ;
+    on s'arrête dès que la priorité maximale est trouvée.
+    """
+
+    __slots__ = ("rules", "_pattern", "_by_id", "_top")
+
+    def __init__(self, rules: tuple[RarityRule, ...]):
+        self.rules = rules
+        self._by_id = {emoji_id: rule for rule in rules for emoji_id in rule.emoji_ids}
+        # Les IDs les plus longs d'abord : pas de préfixe qui masque un ID plus long
+        ids = sorted(self._by_id, key=len, reverse=True)
+        self._pattern = re.compile("|".join(map(re.escape, ids))) if ids else None
+        self._top = max((rule.priority for rule in rules), default=0)
+
+    def match(self, description: str) -> RarityRule | None:
+        if self._pattern is None:
+            return None
+        best = None
+        for found in self._pattern.finditer(description):
+            rule = self._by_id[found.group()]
+            if best is None or rule.priority > best.priority:
+                best = rule
+                if rule.priority == self._top:
+                    break
+        return best
+
+
+DEFAULT_MATCHER = RarityMatcher(DEFAULT_RULES)
+
+
+@lru_cache(maxsize=MATCHER_CACHE_SIZE)
+def _compile(raw: str) -> RarityMatcher:
+    try:
+        return RarityMatcher(tuple(RarityRule.from_dict(rule) for rule in json.loads(raw)))
+    except (ValueError, KeyError, TypeError) as e:
+        log.warning("⚠️ Invalid rarity rules, using defaults: %s", e)
+        return DEFAULT_MATCHER
+
+
+def matcher_for(raw_rules: str | None) -> RarityMatcher:
+    """Matcher du serveur, mis en cache par contenu : recompilé seulement si les règles changent."""
+    if not raw_rules:
+        return DEFAULT_MATCHER
+    return _compile(raw_rules)
+
+
+def parse_rules(raw_rules: str | None) -> list[RarityRule]:
+    return list(matcher_for(raw_rules).rules)
+
+
+def dump_rules(rules: list[RarityRule]) -> str:
+    return json.dumps([rule.to_dict() for rule in sorted(rules, key=lambda r: r.priority)])
@@ -0,0 +1,98 @@
+import os
+import math
+import time
+import uuid
+import logging
+from core.cache import TTLCache, MISSING
+
+log = logging.getLogger("core-ratelimit")
+
+L1_DENY_CACHE_SIZE = int(os.getenv("L1_DENY_CACHE_SIZE", "10000"))
+
+# Fenêtre fixe : INCR + PEXPIRE au premier hit. Retourne 0 si autorisé, sinon le PTTL (ms).
+# Une clé sans TTL n'est jamais un compteur de ce script (INCR et PEXPIRE sont atomiques ici) :
+# c'est un ancien cooldown (timestamp sans expiration), ignoré comme une clé absente.
+# KEYS[1] = clé, ARGV[1] = limite, ARGV[2] = fenêtre (ms)
+FIXED_WINDOW_LUA = """
+if redis.call('PTTL', KEYS[1]) == -1 then
+    redis.call('DEL', KEYS[1])
+end
+local count = redis.call('INCR', KEYS[1])
+if count == 1 then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+if count > tonumber(ARGV[1]) then
+    local ttl = redis.call('PTTL', KEYS[1])
+    if ttl < 0 then
+        redis.call('PEXPIRE', KEYS[1], ARGV[2])
+        ttl = tonumber(ARGV[2])
+    end
+    return ttl
+end
+return 0
+"""
+
+# Fenêtre glissante : journal des hits dans un ZSET (score = timestamp ms).
+# KEYS[1] = clé, ARGV[1] = limite, ARGV[2] = fenêtre (ms), ARGV[3] = now (ms), ARGV[4] = id unique
+SLIDING_WINDOW_LUA = """
+local now = tonumber(ARGV[3])
+local window = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, now - window)
+if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[1]) then
+    redis.call('ZADD', KEYS[1], now, ARGV[4])
+    redis.call('PEXPIRE', KEYS[1], window)
+    return 0
+end
+local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+return math.max(1, tonumber(oldest[2]) + window - now)
+"""
+
+
+class RateLimiter:
+    """Cooldowns / rate limits atomiques : un script Lua (un aller-retour) par vérification,
+    clés auto-expirées, et un cache L1 des refus pour ne pas rappeler Redis pendant un refus.
+    """
+
+    def __init__(self, redis):
+        self._denied = TTLCache(L1_DENY_CACHE_SIZE, 24 * 3600)  # clé -> fin du refus (monotonic)
+        self.use_redis(redis)
+
+    def use_redis(self, redis):
+        self.redis = redis
+        if redis:
+            self._fixed = redis.register_script(FIXED_WINDOW_LUA)
+            self._sliding = redis.register_script(SLIDING_WINDOW_LUA)
+
+    async def hit(self, key: str, limit: int, window: float, *, sliding: bool = False) -> float:
+        """Compte un appel. Retourne 0 si autorisé, sinon le nombre de secondes à attendre."""
+        now = time.monotonic()
+        until = self._denied.get(key)
+        if until is not MISSING:
+            if until > now:
+                return until - now
+            self._denied.pop(key)
+
+        if not self.redis:
+            return 0.0
+
+        window_ms = int(window * 1000)
+        try:
+            if sliding:
+                retry_ms = await self._sliding(
+                    keys=[key], args=[limit, window_ms, int(time.time() * 1000), uuid.uuid4().hex]
+                )
+            else:
+                retry_ms = await self._fixed(keys=[key], args=[limit, window_ms])
+        except Exception as e:
+            log.error("❌ Rate limit check failed for %s: %s", key, e)
+            return 0.0
+
+        if retry_ms:
+            retry = int(retry_ms) / 1000
+            self._denied.set(key, now + retry)
+            return retry
+        return 0.0
+
+    async def cooldown(self, key: str, seconds: float) -> int:
+        """Cooldown simple (1 usage par période). Retourne les secondes restantes, arrondies au supérieur."""
+        return math.ceil(await self.hit(key, 1, seconds))
@@ -0,0 +1,143 @@
+import os
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from core.scheduler import Handler
+from core.sharding import owned_shards
+
+log = logging.getLogger("core-reminders")
+
+REMINDER_CLEANUP_MINUTES = int(os.getenv("REMINDER_CLEANUP_MINUTES", "10"))
+RESTORE_PREFETCH = int(os.getenv("RESTORE_PREFETCH", "1000"))
+
+# on_restore(rows) : rows = [[guild_id, user_id, channel_id, remaining_seconds], ...]
+RestoreHook = Callable[[list[list]], None]
+
+
+@dataclass(frozen=True, slots=True)
+class ReminderKind:
+    """Déclaration d'un type de rappel (ligne `task` de la table `reminders`)."""
+    name: str
+    handler: Handler
+    recurrence: timedelta | None = None  # None = rappel unique, supprimé après envoi
+    on_restore: RestoreHook | None = None
+
+
+class ReminderStore:
+    """Registre des types de rappel adossé à la seule table `reminders`.
+
+    Écritures via le write-behind, échéances via le scheduler partagé, une seule
+    requête de restauration pour tous les types et une seule boucle de cleanup.
+    """
+
+    def __init__(self, bot, bot_name: str, cleanup: bool = True, scoped: bool = False):
+        self.bot = bot
+        self.bot_name = bot_name
+        self.cleanup = cleanup  # en cluster, un seul worker purge la table
+        self.scoped = scoped  # scheduler partagé entre bots : types préfixés par bot_name
+        self.kinds: dict[str, ReminderKind] = {}
+        self._task: asyncio.Task | None = None
+
+    def _key(self, kind: str) -> str:
+        """Type tel que vu par le scheduler."""
+        return f"{self.bot_name}/{kind}" if self.scoped else kind
+
+    def register(self, kind: ReminderKind):
+        self.kinds[kind.name] = kind
+        self.bot.scheduler.register(self._key(kind.name), lambda g, u, c: self._fire(kind, g, u, c))
+
+    async def is_active(self, kind: str, guild_id: int, user_id: int) -> bool:
+        return await self.bot.scheduler.is_scheduled(self._key(kind), guild_id, user_id)
+
+    async def count(self, kind: str) -> int:
+        return await self.bot.scheduler.count(self._key(kind))
+
+    async def start(self, kind: str, guild_id: int, user_id: int, channel_id: int, expire_at: datetime):
+        recurrence = self.kinds[kind].recurrence
+        self.bot.reminder_writes.upsert(self.bot_name, kind, guild_id, user_id, channel_id, expire_at, recurrence)
+        await self.bot.scheduler.schedule(self._key(kind), guild_id, user_id, channel_id, expire_at.timestamp())
+
+    async def cancel(self, kind: str, guild_id: int, user_id: int) -> bool:
+        """Annule un rappel actif. Retourne False s'il n'existait pas."""
+        if not await self.bot.scheduler.cancel(self._key(kind), guild_id, user_id):
+            return False
+        self.bot.reminder_writes.delete(self.bot_name, kind, guild_id, user_id)
+        return True
+
+    async def _fire(self, kind: ReminderKind, guild_id: int, user_id: int, channel_id: int):
+        if kind.recurrence:
+            await self.start(kind.name, guild_id, user_id, channel_id, datetime.now(timezone.utc) + kind.recurrence)
+        else:
+            self.bot.reminder_writes.delete(self.bot_name, kind.name, guild_id, user_id)
+        await kind.handler(guild_id, user_id, channel_id)
+
+    def run(self):
+        """Lance la restauration (après on_ready) puis la boucle de cleanup commune."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="reminder-store")
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        # Aussi avec le backend Redis : la restauration NX ne recrée que les entrées absentes
+        try:
+            await self.restore()
+        except Exception:
+            log.exception("❌ Reminder restore failed")
+        while self.cleanup:
+            await asyncio.sleep(REMINDER_CLEANUP_MINUTES * 60)
+            try:
+                await self.bot.db.delete_expired_reminders(datetime.now(timezone.utc))
+                log.info("🧹 Cleanup: expired reminders deleted")
+            except Exception:
+                log.exception("❌ Reminder cleanup failed")
+
+    async def restore(self):
+        """Une seule passe curseur pour tous les types : les lignes vivantes absentes du scheduler sont replanifiées.
+
+        En cluster, seuls les serveurs des shards de ce worker sont lus.
+        """
+        now = datetime.now(timezone.utc)
+        restored: dict[str, list[list]] = {name: [] for name in self.kinds}
+        shards = owned_shards(self.bot)
+
+        async for row in self.bot.db.stream_reminders(self.bot_name, prefetch=RESTORE_PREFETCH, shards=shards):
+            kind = self.kinds.get(row["task"])
+            if kind is None:
+                continue
+            expire_at = row["expire_at"]
+            if expire_at <= now:
+                if not kind.recurrence:
+                    continue
+                # Occurrence manquée pendant l'arrêt : on l'envoie tout de suite
+                expire_at = now
+
+            guild = self.bot.get_guild(row["guild_id"])
+            if not guild:
+                continue
+            if not guild.get_channel(row["channel_id"]):
+                continue
+
+            added = await self.bot.scheduler.schedule_if_absent(
+                self._key(kind.name), row["guild_id"], row["user_id"], row["channel_id"], expire_at.timestamp()
+            )
+            if not added:
+                continue
+            restored[kind.name].append(
+                [row["guild_id"], row["user_id"], row["channel_id"], (expire_at - now).total_seconds()]
+            )
+
+        if self.cleanup:
+            await self.bot.db.delete_expired_reminders(now)
+
+        for name, rows in restored.items():
+            log.info("♻️ Restored %s %s reminders", len(rows), name)
+            hook = self.kinds[name].on_restore
+            if hook:
+                hook(rows)
@@ -0,0 +1,307 @@
+import os
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import suppress
+from typing import Awaitable, Callable
+
+log = logging.getLogger("core-scheduler")
+
+# handler(guild_id, user_id, channel_id)
+Handler = Callable[[int, int, int], Awaitable[None]]
+
+# Une entrée du tas : [deadline, seq, kind, guild_id, user_id, channel_id]
+# kind = None => entrée annulée (suppression paresseuse)
+_DEADLINE, _SEQ, _KIND, _GUILD, _USER, _CHANNEL = range(6)
+
+# Compactage du tas quand il contient trop d'entrées annulées
+COMPACT_MIN_REMOVED = 1024
+
+# Backend Redis : fréquence de polling et taille max d'un lot réclamé
+SCHEDULER_POLL_INTERVAL = float(os.getenv("SCHEDULER_POLL_INTERVAL", "1"))
+SCHEDULER_CLAIM_BATCH = int(os.getenv("SCHEDULER_CLAIM_BATCH", "200"))
+# Rappel réclamé sans handler (type pas encore enregistré) : remis dans le ZSET après ce délai
+SCHEDULER_UNKNOWN_RETRY = float(os.getenv("SCHEDULER_UNKNOWN_RETRY", "30"))
+
+# Réclame atomiquement les rappels échus : ZRANGEBYSCORE + ZREM (+ channel stocké en hash)
+# KEYS[1] = zset des échéances, KEYS[2] = hash member -> channel_id
+# ARGV[1] = now, ARGV[2] = limite
+CLAIM_DUE_LUA = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+local out = {}
+for _, member in ipairs(due) do
+    redis.call('ZREM', KEYS[1], member)
+    out[#out + 1] = member
+    out[#out + 1] = redis.call('HGET', KEYS[2], member) or '0'
+    redis.call('HDEL', KEYS[2], member)
+end
+return out
+"""
+
+
+class ReminderScheduler:
+    """Scheduler unique (min-heap) partagé par tous les cogs de rappel.
+
+    Chaque rappel en attente n'est qu'une petite liste d'entiers et une deadline
+    (timestamp UTC) : aucune coroutine, aucun Member/TextChannel retenu.
+    Un seul dispatcher réveille les handlers enregistrés par type (`kind`).
+    État en mémoire uniquement : les cogs doivent restaurer depuis Postgres au démarrage.
+    """
+
+    def __init__(self):
+        self._heap: list[list] = []
+        self._entries: dict[tuple[str, int, int], list] = {}
+        self._counts: dict[str, int] = {}
+        self._handlers: dict[str, Handler] = {}
+        self._counter = itertools.count()
+        self._removed = 0
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._firing: set[asyncio.Task] = set()
+
+    def register(self, kind: str, handler: Handler):
+        """Associe un handler async à un type de rappel."""
+        self._handlers[kind] = handler
+
+    async def schedule(self, kind: str, guild_id: int, user_id: int, channel_id: int, deadline: float):
+        """Planifie (ou replanifie) un rappel pour `deadline` (timestamp epoch)."""
+        key = (kind, guild_id, user_id)
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._discard(old)
+        else:
+            self._counts[kind] = self._counts.get(kind, 0) + 1
+
+        entry = [deadline, next(self._counter), kind, guild_id, user_id, channel_id]
+        self._entries[key] = entry
+        heapq.heappush(self._heap, entry)
+        if self._heap[0] is entry:
+            self._wakeup.set()
+        self._ensure_running()
+
+    async def schedule_if_absent(self, kind: str, guild_id: int, user_id: int, channel_id: int, deadline: float) -> bool:
+        """Planifie seulement si aucun rappel n'est déjà en attente (restauration idempotente)."""
+        if (kind, guild_id, user_id) in self._entries:
+            return False
+        await self.schedule(kind, guild_id, user_id, channel_id, deadline)
+        return True
+
+    async def cancel(self, kind: str, guild_id: int, user_id: int) -> bool:
+        """Annule un rappel en O(1). Retourne False s'il n'existait pas."""
+        entry = self._entries.pop((kind, guild_id, user_id), None)
+        if entry is None:
+            return False
+        self._discard(entry)
+        self._counts[kind] -= 1
+        return True
+
+    async def is_scheduled(self, kind: str, guild_id: int, user_id: int) -> bool:
+        return (kind, guild_id, user_id) in self._entries
+
+    async def deadline(self, kind: str, guild_id: int, user_id: int) -> float | None:
+        entry = self._entries.get((kind, guild_id, user_id))
+        return entry[_DEADLINE] if entry else None
+
+    async def count(self, kind: str | None = None) -> int:
+        if kind is None:
+            return len(self._entries)
+        return self._counts.get(kind, 0)
+
+    def _discard(self, entry: list):
+        entry[_KIND] = None
+        self._removed += 1
+        if self._removed >= COMPACT_MIN_REMOVED and self._removed > len(self._heap) // 2:
+            self._heap = [e for e in self._heap if e[_KIND] is not None]
+            heapq.heapify(self._heap)
+            self._removed = 0
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._dispatch(), name="reminder-scheduler")
+
+    def start(self):
+        self._ensure_running()
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._firing.add(task)
+        task.add_done_callback(self._firing.discard)
+
+    def _pop_due(self, now: float) -> list[list]:
+        due = []
+        heap = self._heap
+        while heap and (heap[0][_KIND] is None or heap[0][_DEADLINE] <= now):
+            entry = heapq.heappop(heap)
+            if entry[_KIND] is None:
+                self._removed -= 1
+                continue
+            del self._entries[(entry[_KIND], entry[_GUILD], entry[_USER])]
+            self._counts[entry[_KIND]] -= 1
+            due.append(entry)
+        return due
+
+    async def _fire(self, entry: list):
+        kind = entry[_KIND]
+        handler = self._handlers.get(kind)
+        if handler is None:
+            log.warning("⚠️ No handler registered for %s reminders", kind)
+            return
+        try:
+            await handler(entry[_GUILD], entry[_USER], entry[_CHANNEL])
+        except Exception:
+            log.exception("❌ %s reminder failed (guild=%s user=%s)", kind, entry[_GUILD], entry[_USER])
+
+    async def _dispatch(self):
+        log.info("⏲️ Reminder scheduler started")
+        while True:
+            self._wakeup.clear()
+            due = self._pop_due(time.time())
+            if due:
+                # Les handlers passent par la file d'envoi : on ne bloque pas le dispatcher dessus
+                for entry in due:
+                    self._spawn(self._fire(entry))
+                continue
+
+            timeout = self._heap[0][_DEADLINE] - time.time() if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+class RedisReminderScheduler:
+    """Backend distribué : les échéances vivent dans un ZSET Redis (score = expire_at).
+
+    Member = "bot:kind:guild:user". Chaque worker réclame les rappels échus avec un
+    script Lua atomique, donc un rappel n'est déclenché que par un seul process.
+    Postgres reste la source de vérité : la restauration (NX) recrée les entrées
+    absentes du ZSET (bascule depuis le backend mémoire, perte de données Redis).
+    """
+
+    def __init__(self, redis, bot_name: str, autostart: bool = True):
+        self.redis = redis
+        self.bot_name = bot_name
+        # False (multi-bots) : le dispatcher attend `start()`, une fois tous les types enregistrés
+        self.autostart = autostart
+        self.due_key = f"scheduler:{bot_name}:due"
+        self.channels_key = f"scheduler:{bot_name}:channels"
+        self._handlers: dict[str, Handler] = {}
+        self._claim = redis.register_script(CLAIM_DUE_LUA)
+        self._task: asyncio.Task | None = None
+        self._firing: set[asyncio.Task] = set()
+
+    def use_redis(self, redis):
+        self.redis = redis
+        self._claim = redis.register_script(CLAIM_DUE_LUA)
+
+    def _member(self, kind: str, guild_id: int, user_id: int) -> str:
+        return f"{self.bot_name}:{kind}:{guild_id}:{user_id}"
+
+    def register(self, kind: str, handler: Handler):
+        self._handlers[kind] = handler
+        if self.autostart:
+            self.start()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._dispatch(), name="redis-reminder-scheduler")
+
+    async def schedule(self, kind: str, guild_id: int, user_id: int, channel_id: int, deadline: float):
+        member = self._member(kind, guild_id, user_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self.channels_key, member, channel_id)
+            pipe.zadd(self.due_key, {member: deadline})
+            await pipe.execute()
+
+    async def schedule_if_absent(self, kind: str, guild_id: int, user_id: int, channel_id: int, deadline: float) -> bool:
+        """ZADD NX / HSETNX : n'écrase jamais une échéance vivante."""
+        member = self._member(kind, guild_id, user_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hsetnx(self.channels_key, member, channel_id)
+            pipe.zadd(self.due_key, {member: deadline}, nx=True)
+            _, added = await pipe.execute()
+        return bool(added)
+
+    async def cancel(self, kind: str, guild_id: int, user_id: int) -> bool:
+        member = self._member(kind, guild_id, user_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(self.due_key, member)
+            pipe.hdel(self.channels_key, member)
+            removed, _ = await pipe.execute()
+        return bool(removed)
+
+    async def is_scheduled(self, kind: str, guild_id: int, user_id: int) -> bool:
+        return await self.redis.zscore(self.due_key, self._member(kind, guild_id, user_id)) is not None
+
+    async def deadline(self, kind: str, guild_id: int, user_id: int) -> float | None:
+        return await self.redis.zscore(self.due_key, self._member(kind, guild_id, user_id))
+
+    async def count(self, kind: str | None = None) -> int:
+        if kind is None:
+            return await self.redis.zcard(self.due_key)
+        total = 0
+        async for _ in self.redis.zscan_iter(self.due_key, match=f"{self.bot_name}:{kind}:*"):
+            total += 1
+        return total
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._firing.add(task)
+        task.add_done_callback(self._firing.discard)
+
+    async def _fire(self, member: str, channel_id: int):
+        _, kind, guild_id, user_id = member.rsplit(":", 3)
+        handler = self._handlers.get(kind)
+        if handler is None:
+            # Déjà retiré par le script de claim : on le remet plutôt que de le perdre
+            log.warning("⚠️ No handler registered for %s reminders, requeued in %ss", kind, SCHEDULER_UNKNOWN_RETRY)
+            try:
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    pipe.hsetnx(self.channels_key, member, channel_id)
+                    pipe.zadd(self.due_key, {member: time.time() + SCHEDULER_UNKNOWN_RETRY}, nx=True)
+                    await pipe.execute()
+            except Exception as e:
+                log.error("❌ Failed to requeue %s: %s", member, e)
+            return
+        try:
+            await handler(int(guild_id), int(user_id), channel_id)
+        except Exception:
+            log.exception("❌ %s reminder failed (guild=%s user=%s)", kind, guild_id, user_id)
+
+    async def _dispatch(self):
+        log.info("⏲️ Redis reminder scheduler started (%s)", self.due_key)
+        while True:
+            try:
+                claimed = await self._claim(
+                    keys=[self.due_key, self.channels_key],
+                    args=[time.time(), SCHEDULER_CLAIM_BATCH]
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error("❌ Redis scheduler claim failed: %s", e)
+                await asyncio.sleep(SCHEDULER_POLL_INTERVAL)
+                continue
+
+            if claimed:
+                for member, channel in zip(claimed[::2], claimed[1::2]):
+                    self._spawn(self._fire(member, int(channel)))
+                if len(claimed) // 2 >= SCHEDULER_CLAIM_BATCH:
+                    continue
+            await asyncio.sleep(SCHEDULER_POLL_INTERVAL)
@@ -0,0 +1,18 @@
+import os
+
+# Sharding / cluster (renseignés par cluster.py pour chaque worker)
+SHARDED = os.getenv("SHARDED", "0") == "1"
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "0")) or None
+SHARD_IDS = [int(i) for i in os.getenv("SHARD_IDS", "").split(",") if i.strip()] or None
+CLUSTER_ID = int(os.getenv("CLUSTER_ID", "0"))
+# Le worker 0 fait le travail global (migrations de partitions, cleanup, sync des commandes)
+PRIMARY_WORKER = CLUSTER_ID == 0
+
+
+def owned_shards(bot) -> tuple[int, list[int]] | None:
+    """(shard_count, shard_ids) de ce process, ou None s'il possède tous les serveurs."""
+    shard_count = bot.shard_count or 1
+    shard_ids = getattr(bot, "shard_ids", None)
+    if shard_count <= 1 or not shard_ids or len(shard_ids) >= shard_count:
+        return None
+    return shard_count, sorted(shard_ids)
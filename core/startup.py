@@ -0,0 +1,149 @@
+import os
+import time
+import random
+import asyncio
+import logging
+from contextlib import contextmanager
+from typing import Awaitable, Callable, TypeVar
+
+log = logging.getLogger("core-startup")
+
+T = TypeVar("T")
+
+STARTUP_RETRIES = int(os.getenv("STARTUP_RETRIES", "4"))
+RETRY_BASE_SECONDS = float(os.getenv("RETRY_BASE_SECONDS", "0.5"))
+RETRY_MAX_SECONDS = float(os.getenv("RETRY_MAX_SECONDS", "8"))
+BACKEND_CHECK_INTERVAL = float(os.getenv("BACKEND_CHECK_INTERVAL", "30"))
+BACKEND_CHECK_TIMEOUT = 5
+# Échecs consécutifs du health check avant de remplacer un client encore présent
+BACKEND_FAILURES_BEFORE_SWAP = 3
+
+# Composants qui gardent une référence au client Redis
+REDIS_COMPONENTS = ("scheduler", "events", "ratelimits", "reminder_optouts")
+
+
+async def retry(name: str, attempt: Callable[[], Awaitable[T]], attempts: int = STARTUP_RETRIES) -> T:
+    """Réessaie `attempt` avec un backoff exponentiel à jitter complet ; relève la dernière erreur."""
+    for n in range(1, attempts + 1):
+        try:
+            return await attempt()
+        except Exception as e:
+            if n == attempts:
+                raise
+            delay = random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** n))
+            log.warning("⚠️ %s connection failed (attempt %s/%s): %s, retrying in %.1fs", name, n, attempts, e, delay)
+            await asyncio.sleep(delay)
+
+
+class PhaseTimer:
+    """Chronomètre les phases du démarrage et les résume en une ligne."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: list[tuple[str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def summary(self) -> str:
+        parts = [f"{name}={elapsed * 1000:.0f}ms" for name, elapsed in self.phases]
+        return " | ".join(parts) + f" | total={(time.perf_counter() - self.started) * 1000:.0f}ms"
+
+
+def swap_redis(bot, client):
+    """Met en service un nouveau client Redis partout où l'ancien était référencé."""
+    bot.redis = client
+    for name in REDIS_COMPONENTS:
+        component = getattr(bot, name, None)
+        if hasattr(component, "use_redis"):
+            component.use_redis(client)
+    # Backends partagés (multi-bots) : chaque client rattaché voit le nouveau client
+    for tenant in getattr(bot, "bots", ()):
+        tenant.redis = client
+
+
+class BackendReconnector:
+    """Surveille Postgres et Redis en tâche de fond et remplace un backend absent ou défaillant.
+
+    Postgres : un nouveau pool est mis en service dans `bot.db` (les cogs passent tous par lui).
+    Redis : le nouveau client est propagé aux composants via `swap_redis`.
+    """
+
+    def __init__(self, bot, redis_factory: Callable[[], Awaitable], on_db_connected: Callable[[], Awaitable] | None = None):
+        self.bot = bot
+        self.redis_factory = redis_factory
+        self.on_db_connected = on_db_connected
+        self._db_failures = 0
+        self._redis_failures = 0
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="backend-reconnector")
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(BACKEND_CHECK_INTERVAL)
+            await asyncio.gather(self.check_db(), self.check_redis())
+
+    async def check_db(self):
+        db = self.bot.db
+        if db.pool is not None:
+            try:
+                await asyncio.wait_for(db.ping(), BACKEND_CHECK_TIMEOUT)
+                self._db_failures = 0
+                return
+            except Exception as e:
+                self._db_failures += 1
+                log.warning("⚠️ Postgres health check failed (%s/%s): %s",
+                            self._db_failures, BACKEND_FAILURES_BEFORE_SWAP, e)
+                if self._db_failures < BACKEND_FAILURES_BEFORE_SWAP:
+                    return
+
+        was_missing = db.pool is None
+        try:
+            await db.reconnect()
+        except Exception as e:
+            log.error("❌ Postgres reconnect failed: %s", e)
+            return
+        self._db_failures = 0
+        log.info("🔁 Postgres pool replaced")
+        if was_missing and self.on_db_connected:
+            await self.on_db_connected()
+
+    async def check_redis(self):
+        client = self.bot.redis
+        if client is not None:
+            try:
+                await asyncio.wait_for(client.ping(), BACKEND_CHECK_TIMEOUT)
+                self._redis_failures = 0
+                return
+            except Exception as e:
+                self._redis_failures += 1
+                log.warning("⚠️ Redis health check failed (%s/%s): %s",
+                            self._redis_failures, BACKEND_FAILURES_BEFORE_SWAP, e)
+                if self._redis_failures < BACKEND_FAILURES_BEFORE_SWAP:
+                    return
+
+        try:
+            new_client = await self.redis_factory()
+        except Exception as e:
+            log.error("❌ Redis reconnect failed: %s", e)
+            return
+        self._redis_failures = 0
+        swap_redis(self.bot, new_client)
+        log.info("🔁 Redis client replaced")
+        if client is not None:
+            try:
+                await client.aclose()
+            except Exception:
+                pass
@@ -0,0 +1,94 @@
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+import asyncpg
+
+log = logging.getLogger("core-subscriptions")
+
+SUBSCRIPTIONS_CHANNEL = "subscriptions_changed"
+# 1 = HighTier / Reminder ne travaillent que pour les serveurs abonnés
+SUBSCRIPTION_GATING = os.getenv("SUBSCRIPTION_GATING", "0") == "1"
+RECONNECT_SECONDS = 5
+
+
+class SubscriptionRegistry:
+    """Index mémoire server_id -> expiration (epoch) des abonnements.
+
+    Chargé en bloc au démarrage, tenu à jour par `LISTEN subscriptions_changed`
+    (trigger sur `subscriptions`, payload "server_id:epoch" ou "server_id:" si supprimé).
+    Les entrées expirent localement par comparaison de timestamp : aucun aller-retour
+    Postgres sur le chemin chaud.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.loaded = False
+        self._expiry: dict[int, float] = {}
+        self._task: asyncio.Task | None = None
+
+    def is_active(self, guild_id: int) -> bool:
+        expiry = self._expiry.get(guild_id)
+        if expiry is None:
+            return False
+        if expiry <= time.time():
+            del self._expiry[guild_id]
+            return False
+        return True
+
+    def allows(self, guild_id: int) -> bool:
+        """Gating des fonctionnalités : ouvert si désactivé ou si l'index n'est pas (encore) chargé."""
+        return not SUBSCRIPTION_GATING or not self.loaded or self.is_active(guild_id)
+
+    def expire_at(self, guild_id: int) -> datetime | None:
+        if not self.is_active(guild_id):
+            return None
+        return datetime.fromtimestamp(self._expiry[guild_id], timezone.utc)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="subscription-registry")
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    def _on_notify(self, conn, pid, channel, payload: str):
+        try:
+            server_id, _, expiry = payload.partition(":")
+            if expiry:
+                self._expiry[int(server_id)] = float(expiry)
+            else:
+                self._expiry.pop(int(server_id), None)
+        except ValueError:
+            log.warning("⚠️ Invalid subscription notification: %r", payload)
+
+    async def _run(self):
+        while True:
+            lost = asyncio.Event()
+            conn = None
+            try:
+                # Connexion dédiée : un LISTEN garde sa connexion, on n'en prend pas une au pool
+                conn = await asyncpg.connect(dsn=self.db.dsn)
+                conn.add_termination_listener(lambda _: lost.set())
+                # Écoute avant le chargement : aucune mise à jour perdue entre les deux
+                await conn.add_listener(SUBSCRIPTIONS_CHANNEL, self._on_notify)
+                rows = await conn.fetch(
+                    "SELECT server_id, extract(epoch FROM expire_at) AS expiry "
+                    "FROM subscriptions WHERE expire_at > CURRENT_TIMESTAMP"
+                )
+                self._expiry = {row["server_id"]: float(row["expiry"]) for row in rows}
+                self.loaded = True
+                log.info("💳 Subscriptions loaded (%s active servers)", len(self._expiry))
+                await lost.wait()
+                log.warning("⚠️ Subscription listener connection lost, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error("❌ Subscription listener failed: %s", e)
+            finally:
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+            await asyncio.sleep(RECONNECT_SECONDS)
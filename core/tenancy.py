@@ -0,0 +1,42 @@
+import os
+
+# Multi-bots : "Moonquil:token1,Sunflower:token2" (un client Discord par entrée, un seul process)
+BOT_TOKENS = os.getenv("BOT_TOKENS", "")
+# Espace de noms du scheduler Redis partagé par tous les bots du process
+SHARED_SCHEDULER_NAME = os.getenv("SHARED_SCHEDULER_NAME", "multibot")
+# Bot propriétaire des anciennes tables daily/vote (sans bot_name) : pas de valeur devinée en multi-bots
+LEGACY_BOT_NAME = os.getenv("LEGACY_BOT_NAME") or None
+
+# Services communs à tous les bots du process (mêmes objets sur chaque client)
+SHARED_SERVICES = (
+    "db", "redis", "scheduler", "reminder_writes", "events",
+    "ratelimits", "reminder_optouts", "subscriptions", "reconnector",
+)
+
+
+def parse_tenants(raw: str) -> list[tuple[str, str]]:
+    """[(bot_name, token), ...] depuis BOT_TOKENS."""
+    tenants = []
+    for entry in raw.split(","):
+        name, _, token = entry.strip().partition(":")
+        if name and token:
+            tenants.append((name.strip(), token.strip()))
+    return tenants
+
+
+class SharedBackends:
+    """Backends d'un process multi-bots : un pool asyncpg, un client Redis, un scheduler.
+
+    Expose les mêmes attributs qu'un bot (`db`, `redis`, `scheduler`, ...) pour que
+    les fonctions de démarrage et le `BackendReconnector` s'appliquent tels quels.
+    Les clients rattachés reçoivent des références vers ces mêmes objets.
+    """
+
+    def __init__(self):
+        self.bots: list = []
+        for name in SHARED_SERVICES:
+            setattr(self, name, None)
+
+    def attach(self, bot):
+        for name in SHARED_SERVICES:
+            setattr(bot, name, getattr(self, name))
@@ -0,0 +1,129 @@
+import os
+import asyncio
+import itertools
+import logging
+from contextlib import suppress
+from datetime import datetime, timedelta
+
+from core.database import Database
+
+log = logging.getLogger("core-writebehind")
+
+WRITE_BEHIND_INTERVAL = float(os.getenv("WRITE_BEHIND_INTERVAL", "0.5"))  # secondes
+WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", "500"))
+# Postgres indisponible : backoff exponentiel plafonné et tampon borné (les plus anciennes clés sont perdues)
+WRITE_BEHIND_MAX_BACKOFF = float(os.getenv("WRITE_BEHIND_MAX_BACKOFF", "30"))
+WRITE_BEHIND_MAX_BUFFER = int(os.getenv("WRITE_BEHIND_MAX_BUFFER", "100000"))
+
+# (bot_name, task, guild_id, user_id) -> (channel_id, expire_at, recurrence) pour un upsert, None pour un delete
+Key = tuple[str, str, int, int]
+
+
+class ReminderWriteBehind:
+    """Tampon write-behind pour la table `reminders`.
+
+    Les upserts/deletes sont fusionnés par clé pendant une courte fenêtre puis
+    écrits en une transaction : COPY vers une table temporaire, puis DELETE des
+    lignes remplacées + INSERT depuis cette table (la clé primaire partitionnée
+    inclut expire_at, pas d'ON CONFLICT possible), et un seul DELETE pour les suppressions.
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+        self._pending: dict[Key, tuple[int, datetime, timedelta | None] | None] = {}
+        self._flush_now = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._failures = 0
+        self.dropped = 0
+
+    def upsert(self, bot_name: str, task: str, guild_id: int, user_id: int, channel_id: int, expire_at: datetime,
+               recurrence: timedelta | None = None):
+        self._pending[(bot_name, task, guild_id, user_id)] = (channel_id, expire_at, recurrence)
+        self._kick()
+
+    def delete(self, bot_name: str, task: str, guild_id: int, user_id: int):
+        self._pending[(bot_name, task, guild_id, user_id)] = None
+        self._kick()
+
+    def _kick(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="reminder-write-behind")
+        self._trim()
+        if len(self._pending) >= WRITE_BEHIND_MAX_PENDING:
+            self._flush_now.set()
+
+    def _trim(self):
+        """Borne le tampon en supprimant les clés les plus anciennes."""
+        excess = len(self._pending) - WRITE_BEHIND_MAX_BUFFER
+        if excess <= 0:
+            return
+        for key in list(itertools.islice(self._pending, excess)):
+            del self._pending[key]
+        self.dropped += excess
+        log.error("❌ Write-behind buffer full (%s ops): dropped %s oldest writes (%s total)",
+                  WRITE_BEHIND_MAX_BUFFER, excess, self.dropped)
+
+    async def _run(self):
+        while True:
+            if self._failures:
+                # Postgres en échec : backoff exponentiel, les flushs anticipés sont ignorés
+                await asyncio.sleep(min(WRITE_BEHIND_INTERVAL * 2 ** min(self._failures, 16), WRITE_BEHIND_MAX_BACKOFF))
+            else:
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._flush_now.wait(), WRITE_BEHIND_INTERVAL)
+            self._flush_now.clear()
+            await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            try:
+                await self._write(batch)
+            except asyncio.CancelledError:
+                # Annulé en plein flush (arrêt) : la transaction est annulée, le lot revient dans le tampon
+                self._requeue(batch)
+                raise
+            except Exception as e:
+                self._failures += 1
+                # Trace complète au premier échec seulement, puis une ligne par tentative
+                if self._failures == 1:
+                    log.exception("❌ Write-behind flush failed (%s ops), will retry", len(batch))
+                else:
+                    log.warning("⚠️ Write-behind flush still failing (attempt %s, %s ops pending): %s",
+                                self._failures, len(batch) + len(self._pending), e)
+                self._requeue(batch)
+                return
+            if self._failures:
+                log.info("✅ Write-behind recovered after %s failed attempts", self._failures)
+                self._failures = 0
+
+    def _requeue(self, batch: dict):
+        # Les écritures plus récentes gagnent sur celles du lot échoué, qui reste en tête (plus ancien)
+        batch.update(self._pending)
+        self._pending = batch
+        self._trim()
+
+    async def _write(self, batch: dict[Key, tuple[int, datetime, timedelta | None] | None]):
+        upserts = []
+        deletes: list[list] = [[], [], [], []]
+        for (bot_name, task, guild_id, user_id), value in batch.items():
+            if value is None:
+                for column, item in zip(deletes, (bot_name, task, guild_id, user_id)):
+                    column.append(item)
+            else:
+                upserts.append((bot_name, task, guild_id, user_id, *value))
+
+        await self.db.apply_reminder_writes(upserts, deletes)
+        log.debug("💾 Write-behind flushed %s upserts, %s deletes", len(upserts), len(deletes[0]))
+
+    async def close(self):
+        """Arrête la boucle et vide le tampon (appelé à l'arrêt du bot)."""
+        if self._task:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
@@ -1,11 +1,27 @@
 # main.py
 import os
+import signal
+import asyncio
 import logging
 import glob
 import discord
 from discord.ext import commands
-import asyncpg
 import redis.asyncio as redis
+from core.scheduler import ReminderScheduler, RedisReminderScheduler
+from core.writebehind import ReminderWriteBehind
+from core.reminders import ReminderStore
+from core.members import MemberResolver
+from core.outbound import OutboundQueue
+from core.events import EventBus
+from core.ratelimit import RateLimiter
+from core.preferences import ReminderOptOuts
+from core.subscriptions import SubscriptionRegistry
+from core.database import Database
+from core.commandsync import sync_if_changed
+from core.startup import BackendReconnector, PhaseTimer, retry
+from core.metrics import instrument_redis
+from core.sharding import SHARDED, SHARD_COUNT, SHARD_IDS, CLUSTER_ID, PRIMARY_WORKER
+from core.tenancy import SharedBackends
 
 # --- Logging ---
 logging.basicConfig(
@@ -19,81 +35,218 @@ TOKEN = os.getenv("DISCORD_TOKEN")
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
 DATABASE_URL = os.getenv("DATABASE_URL")  # ← ajoute ta URL Postgres
 COMMAND_PREFIX = os.getenv("COMMAND_PREFIX", "m?")  # prefix configurable (default: m?)
+# Mode raw (cogs/embed_events.py) : plus besoin du cache de messages
+RAW_GATEWAY_EDITS = os.getenv("RAW_GATEWAY_EDITS", "0") == "1"
+MAX_MESSAGES = int(os.getenv("MAX_MESSAGES", "0" if RAW_GATEWAY_EDITS else "1000"))
+# Profil "lean" : pas d'intent members, aucun Member en cache, pas de chunking au démarrage
+LEAN_PROFILE = os.getenv("LEAN_PROFILE", "0") == "1"
+# Les embeds d'un autre bot sont vides sans message_content : à ne couper que si on n'en a pas besoin
+MESSAGE_CONTENT_INTENT = os.getenv("MESSAGE_CONTENT_INTENT", "1") == "1"
+# Scheduler : "memory" (un seul process) ou "redis" (ZSET partagé entre réplicas)
+SCHEDULER_BACKEND = os.getenv("SCHEDULER_BACKEND", "memory")
+BOT_NAME = os.getenv("BOT_NAME", "Moonquil")
+# Applique les migrations de schéma au démarrage (désactivable si gérées ailleurs)
+RUN_MIGRATIONS = os.getenv("RUN_MIGRATIONS", "1") == "1"
 
 # --- Intents ---
 intents = discord.Intents.default()
-intents.message_content = True
+intents.message_content = MESSAGE_CONTENT_INTENT
 intents.guilds = True
-intents.members = True
+intents.members = not LEAN_PROFILE
 intents.messages = True
 
-# --- Bot ---
-bot = commands.Bot(
-    command_prefix=COMMAND_PREFIX,
-    intents=intents,
-    case_insensitive=True
-)
+if LEAN_PROFILE:
+    member_cache_flags = discord.MemberCacheFlags.none()
+else:
+    member_cache_flags = discord.MemberCacheFlags.from_intents(intents)
+
+# --- Backends (un bot seul, ou SharedBackends partagés par plusieurs bots) ---
+async def create_redis():
+    client = instrument_redis(await redis.from_url(REDIS_URL, decode_responses=True))
+    await client.ping()
+    return client
+
+async def run_migrations(target):
+    if not RUN_MIGRATIONS:
+        return
+    try:
+        await target.db.migrate()
+    except Exception:
+        log.exception("❌ Schema migrations failed")
 
-# --- Setup hook ---
-async def setup_hook():
-    # ✅ Connexion Postgres
+async def connect_postgres(target):
+    # ✅ Connexion Postgres (couche d'accès partagée, un seul pool)
     try:
-        bot.db_pool = await asyncpg.create_pool(
-            dsn=DATABASE_URL,
-            min_size=1,
-            max_size=5
-        )
+        await retry("Postgres", target.db.connect)
         log.info("✅ Connected to Postgres at %s", DATABASE_URL)
     except Exception as e:
-        bot.db_pool = None
-        log.error("❌ Postgres connection failed: %s", e)
+        log.error("❌ Postgres connection failed, the reconnector will keep trying: %s", e)
+        return
+    await run_migrations(target)
 
+async def connect_redis(target):
     # ✅ Connexion Redis
     try:
-        bot.redis = await redis.from_url(REDIS_URL, decode_responses=True)
-        await bot.redis.ping()
+        target.redis = await retry("Redis", create_redis)
         log.info("✅ Connected to Redis at %s", REDIS_URL)
     except Exception as e:
-        bot.redis = None
-        log.error("❌ Redis connection failed: %s", e)
-
-    # --- Auto‑load de tous les cogs dans /cogs ---
-    cog_files = glob.glob("cogs/*.py")
-    results = []
-
-    for file in cog_files:
-        cog_name = file.replace("/", ".").replace("\\", ".")[:-3]  # ex: cogs.admin
-        try:
-            await bot.load_extension(cog_name)
-            results.append((cog_name, "✅"))
-        except Exception as e:
-            results.append((cog_name, f"❌ ({type(e).__name__})"))
-            log.exception("❌ Failed to load cog %s", cog_name, exc_info=e)
-
-    # --- Affichage tableau clair ---
-    log.info("📦 Cogs loading summary:")
-    for name, status in results:
-        log.info("   %s %s", status, name)
-
-    # 🔑 Sync global une seule fois au démarrage (slash commands)
-    try:
-        synced = await bot.tree.sync()
-        log.info("🌍 Global slash commands synced (%s commandes)", len(synced))
-    except Exception as e:
-        log.exception("❌ Failed to sync global slash commands:", exc_info=e)
+        target.redis = None
+        log.error("❌ Redis connection failed, the reconnector will keep trying: %s", e)
+
+async def connect_backends(target, bot_name: str | None):
+    # 🔌 Postgres et Redis en parallèle, avec retries et backoff
+    target.db = Database(DATABASE_URL, bot_name)
+    await asyncio.gather(connect_postgres(target), connect_redis(target))
+
+def start_backend_services(target, scheduler_name: str, autostart: bool = True):
+    """Services sans état propre à un client Discord (partageables entre bots).
+
+    `autostart=False` : le dispatcher Redis attend `scheduler.start()` (multi-bots,
+    une fois que tous les clients ont enregistré leurs types de rappel).
+    """
+    # ⏲️ Scheduler partagé par tous les cogs de rappel
+    if SCHEDULER_BACKEND == "redis" and target.redis:
+        target.scheduler = RedisReminderScheduler(target.redis, scheduler_name, autostart=autostart)
+        log.info("⏲️ Scheduler backend: Redis ZSET (%s)", target.scheduler.due_key)
+    else:
+        if SCHEDULER_BACKEND == "redis":
+            log.error("❌ SCHEDULER_BACKEND=redis mais Redis indisponible, fallback mémoire")
+        target.scheduler = ReminderScheduler()
+    # 💾 Écritures INSERT/DELETE des reminders regroupées (write-behind)
+    target.reminder_writes = ReminderWriteBehind(target.db)
+    # 📡 Événements vers le Master (Redis Stream, XADD par lots)
+    target.events = EventBus(target.redis)
+    # ⏳ Cooldowns / rate limits atomiques (Lua) pour les slash commands
+    target.ratelimits = RateLimiter(target.redis)
+    # 🔕 Opt-outs /reminder en mémoire (chargés depuis Redis, synchro pub/sub)
+    target.reminder_optouts = ReminderOptOuts(target.redis)
+    target.reminder_optouts.start()
+    # 💳 Abonnements en mémoire (chargés en bloc, LISTEN subscriptions_changed)
+    target.subscriptions = SubscriptionRegistry(target.db)
+    target.subscriptions.start()
+    # 🔁 Reconnexion en tâche de fond d'un backend absent ou défaillant
+    target.reconnector = BackendReconnector(target, create_redis, on_db_connected=lambda: run_migrations(target))
+    target.reconnector.start()
+
+async def close_backends(target):
+    if getattr(target, "reconnector", None):
+        target.reconnector.stop()
+    if getattr(target, "reminder_writes", None):
+        await target.reminder_writes.close()
+        log.info("💾 Reminder write-behind buffer flushed")
+    if getattr(target, "events", None):
+        await target.events.close()
+    if getattr(target, "db", None):
+        await target.db.close()
+
+# --- Bot ---
+def create_bot(bot_name: str = BOT_NAME, shared: SharedBackends | None = None) -> commands.Bot:
+    """Un client Discord ; avec `shared`, il utilise les backends communs du process multi-bots."""
+    bot_options = dict(
+        command_prefix=COMMAND_PREFIX,
+        intents=intents,
+        case_insensitive=True,
+        max_messages=MAX_MESSAGES or None,
+        member_cache_flags=member_cache_flags,
+        chunk_guilds_at_startup=not LEAN_PROFILE
+    )
+    if SHARDED:
+        # AutoShardedBot : shards gérés par ce process (tous, ou la plage donnée par cluster.py)
+        bot = commands.AutoShardedBot(shard_count=SHARD_COUNT, shard_ids=SHARD_IDS, **bot_options)
+    else:
+        bot = commands.Bot(**bot_options)
+
+    # Clients du process (métriques agrégées) ; le premier fait le travail global (cleanup)
+    if shared is not None:
+        shared.bots.append(bot)
+        bot.tenants = shared.bots
+    else:
+        bot.tenants = [bot]
+    primary = PRIMARY_WORKER and bot is bot.tenants[0]
+
+    # --- Setup hook ---
+    async def setup_hook():
+        timer = PhaseTimer()
+
+        if shared is None:
+            with timer.phase("backends"):
+                await connect_backends(bot, bot_name)
+
+        with timer.phase("services"):
+            if shared is None:
+                start_backend_services(bot, bot_name)
+            else:
+                shared.attach(bot)
+            # 🗂️ Registre des types de rappel (table unique, une restauration + un cleanup pour tous)
+            bot.reminders = ReminderStore(bot, bot_name, cleanup=primary, scoped=shared is not None)
+            bot.reminders.run()
+            # 👤 Résolution paresseuse des Member (fetch_member + LRU)
+            bot.members = MemberResolver()
+            # 📤 File d'envoi commune (token buckets par salon + priorités)
+            bot.outbound = OutboundQueue()
+
+        # 🛑 SIGTERM (redémarrage dyno) => arrêt propre pour vider les tampons (géré par le lanceur en multi-bots)
+        if shared is None:
+            try:
+                asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, lambda: asyncio.create_task(bot.close()))
+            except NotImplementedError:
+                pass
+
+        # --- Auto‑load de tous les cogs dans /cogs (indépendants : chargés en parallèle) ---
+        async def load_cog(file: str) -> tuple[str, str]:
+            cog_name = file.replace("/", ".").replace("\\", ".")[:-3]  # ex: cogs.admin
+            try:
+                await bot.load_extension(cog_name)
+                return cog_name, "✅"
+            except Exception as e:
+                log.exception("❌ Failed to load cog %s", cog_name, exc_info=e)
+                return cog_name, f"❌ ({type(e).__name__})"
+
+        with timer.phase("cogs"):
+            results = await asyncio.gather(*(load_cog(file) for file in sorted(glob.glob("cogs/*.py"))))
+
+        # --- Affichage tableau clair ---
+        log.info("📦 Cogs loading summary (%s):", bot_name)
+        for name, status in results:
+            log.info("   %s %s", status, name)
+
+        # 🔑 Sync global au démarrage, seulement si l'arbre de commandes a changé (worker 0 en cluster)
+        if PRIMARY_WORKER:
+            with timer.phase("command_sync"):
+                try:
+                    synced = await sync_if_changed(bot)
+                    if synced is not None:
+                        log.info("🌍 Global slash commands synced (%s commandes)", len(synced))
+                except Exception as e:
+                    log.exception("❌ Failed to sync global slash commands:", exc_info=e)
+
+        log.info("⏱️ Startup timings (%s): %s", bot_name, timer.summary())
+
+    bot.setup_hook = setup_hook
+
+    # --- Arrêt propre (les backends partagés sont fermés par le lanceur) ---
+    async def close():
+        if shared is None:
+            await close_backends(bot)
+        await commands.Bot.close(bot)
+
+    bot.close = close
 
-bot.setup_hook = setup_hook
+    # --- Events ---
+    @bot.event
+    async def on_ready():
+        log.info("🤖 Bot %s connecté en tant que %s (ID: %s)", bot_name, bot.user, bot.user.id)
+        log.info("🌍 Connecté sur %s serveurs", len(bot.guilds))
+        log.info("⌨️ Prefix actif: %s (slash toujours disponible)", COMMAND_PREFIX)
+        log.info("🪶 Lean profile: %s | message_content: %s", LEAN_PROFILE, MESSAGE_CONTENT_INTENT)
+        if SHARDED:
+            log.info("🧩 Cluster %s: shards %s / %s", CLUSTER_ID, bot.shard_ids, bot.shard_count)
 
-# --- Events ---
-@bot.event
-async def on_ready():
-    log.info("🤖 Bot connecté en tant que %s (ID: %s)", bot.user, bot.user.id)
-    log.info("🌍 Connecté sur %s serveurs", len(bot.guilds))
-    log.info("⌨️ Prefix actif: %s (slash toujours disponible)", COMMAND_PREFIX)
+    return bot
 
 # --- Run ---
 if __name__ == "__main__":
     if not TOKEN:
         log.error("❌ DISCORD_TOKEN manquant dans les variables d'environnement")
     else:
-        bot.run(TOKEN)
+        create_bot().run(TOKEN)
@@ -0,0 +1,50 @@
+# multibot.py — plusieurs bots (BOT_TOKENS) dans un seul process et une seule boucle asyncio
+import signal
+import asyncio
+import logging
+from main import create_bot, connect_backends, start_backend_services, close_backends
+from core.tenancy import BOT_TOKENS, LEGACY_BOT_NAME, SHARED_SCHEDULER_NAME, SharedBackends, parse_tenants
+
+log = logging.getLogger("multibot")
+
+
+async def main(tenants: list[tuple[str, str]]):
+    # Un pool asyncpg, un client Redis et un scheduler pour tous les bots
+    shared = SharedBackends()
+    await connect_backends(shared, LEGACY_BOT_NAME)
+    start_backend_services(shared, SHARED_SCHEDULER_NAME, autostart=False)
+
+    bots = [(create_bot(name, shared), token) for name, token in tenants]
+    log.info("🤝 Starting %s bots: %s", len(bots), ", ".join(name for name, _ in tenants))
+
+    def shutdown():
+        for bot, _ in bots:
+            asyncio.create_task(bot.close())
+
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, shutdown)
+    except NotImplementedError:
+        pass
+
+    try:
+        # login() exécute setup_hook : tous les cogs (et types de rappel) sont chargés avant
+        # que le scheduler commence à réclamer les échéances, pour tous les bots
+        await asyncio.gather(*(bot.login(token) for bot, token in bots))
+        shared.scheduler.start()
+        await asyncio.gather(*(bot.connect() for bot, _ in bots))
+    finally:
+        for bot, _ in bots:
+            if not bot.is_closed():
+                await bot.close()
+        await close_backends(shared)
+
+
+if __name__ == "__main__":
+    tenants = parse_tenants(BOT_TOKENS)
+    if not tenants:
+        log.error("❌ BOT_TOKENS manquant ou vide (format: Nom:token,Nom2:token2)")
+    else:
+        try:
+            asyncio.run(main(tenants))
+        except KeyboardInterrupt:
+            pass